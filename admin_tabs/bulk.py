@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers to write many rows at once, used by the bulk edit action of
+TabbedModelAdmin and by its inline formsets with bulk_save_inlines.
+"""
+from django.db import models, router
+from django.db.models import signals
+from django.dispatch.dispatcher import _make_id
+
+# Rows per query: sqlite does not accept more than 999 parameters by query
+BATCH_SIZE = 100
+
+
+def batches(items, size=BATCH_SIZE):
+    """
+    Yields successive slices of `size` items.
+    """
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def has_receivers(signal, sender):
+    """
+    True if some receiver is connected to `signal` for `sender`.
+    """
+    return bool(signal._live_receivers(_make_id(sender)))
+
+
+def model_has_save_hooks(model):
+    """
+    True if saving an instance of `model` runs some custom code: an
+    overridden save() method or a pre_save/post_save receiver. Queryset
+    updates and bulk inserts would skip it.
+    """
+    for cls in model.mro():
+        if cls is models.Model:
+            break
+        if "save" in cls.__dict__:
+            return True
+    return has_receivers(signals.pre_save, model) or has_receivers(signals.post_save, model)
+
+
+def auto_now_values(model):
+    """
+    Returns the values of the auto_now fields of `model` for an update, as
+    save() would set them.
+    """
+    instance = model()
+    return dict(
+        (field.attname, field.pre_save(instance, False))
+        for field in model._meta.local_fields
+        if getattr(field, "auto_now", False)
+    )
+
+
+def bulk_create(model, objs, using=None):
+    """
+    QuerySet.bulk_create, by batches.
+    """
+    manager = model._default_manager.db_manager(using)
+    for batch in batches(objs):
+        manager.bulk_create(batch)
+
+
+def bulk_update(model, pks, values, using=None):
+    """
+    Set `values` on the rows of `model` whose primary key is in `pks`, by
+    batches.
+    """
+    manager = model._default_manager.db_manager(using)
+    for batch in batches(pks):
+        manager.filter(pk__in=batch).update(**values)
+
+
+class BulkSaveFormSetMixin(object):
+    """
+    Inline formset mixin writing the new objects with bulk inserts, the
+    changed ones with one UPDATE by distinct set of values, and deleting the
+    removed ones with a single filtered delete.
+
+    new_objects, changed_objects and deleted_objects are set as by
+    BaseModelFormSet.save, for the change message of the admin log entry.
+    The formset is saved as usual with commit=False, or if the model has
+    save hooks, parents, or many to many or file fields in the form (the
+    queryset updates do not call Field.pre_save, which writes the uploads).
+
+    bulk_create does not set the auto primary keys of the inserted objects,
+    so the new objects are inserted one by one unless their primary key is
+    already set. Set bulk_create_new_objects on the inline, or on its
+    formset class, to insert them in bulk anyway, if nothing reads the
+    primary key of the new objects returned by save() or listed in
+    new_objects: it stays None.
+    """
+    bulk_create_new_objects = False
+
+    def can_save_in_bulk(self):
+        if model_has_save_hooks(self.model) or self.model._meta.parents:
+            return False
+        opts = self.model._meta
+        unsupported = set(f.name for f in opts.many_to_many)
+        unsupported.update(f.name for f in opts.fields if isinstance(f, models.FileField))
+        return not unsupported.intersection(self.form.base_fields)
+
+    def save(self, commit=True):
+        if not commit or not self.can_save_in_bulk():
+            return super(BulkSaveFormSetMixin, self).save(commit)
+        opts = self.model._meta
+        self.new_objects = []
+        self.changed_objects = []
+        self.deleted_objects = []
+        for form in self.initial_forms:
+            # As BaseModelFormSet.save_existing_objects
+            pk_name = self._pk_field.name
+            pk_value = form.fields[pk_name].clean(form._raw_value(pk_name))
+            pk_value = getattr(pk_value, "pk", pk_value)
+            obj = self._existing_object(pk_value)
+            if self.can_delete and self._should_delete_form(form):
+                self.deleted_objects.append(obj)
+            elif form.has_changed():
+                self.changed_objects.append((form.save(commit=False), form.changed_data))
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            self.new_objects.append(self.save_new(form, commit=False))
+        using = router.db_for_write(self.model, instance=self.instance)
+        manager = self.model._default_manager.db_manager(using)
+        for batch in batches([obj.pk for obj in self.deleted_objects]):
+            manager.filter(pk__in=batch).delete()
+        # Group the changed objects by values to set
+        updates = {}
+        auto_now = auto_now_values(self.model)
+        model_fields = dict((field.name, field) for field in opts.fields)
+        for obj, changed_data in self.changed_objects:
+            values = dict(auto_now)
+            for name in changed_data:
+                if name in model_fields:
+                    attname = model_fields[name].attname
+                    values[attname] = getattr(obj, attname)
+            if not values:
+                continue
+            try:
+                key = tuple(sorted(values.items()))
+                hash(key)
+            except TypeError:
+                key = obj.pk  # Unhashable value: one update for this object
+            updates.setdefault(key, (values, []))[1].append(obj.pk)
+        for values, pks in updates.values():
+            bulk_update(self.model, pks, values, using=using)
+        if self.bulk_create_new_objects:
+            bulk_create(self.model, self.new_objects, using=using)
+        else:
+            bulk_create(self.model, [obj for obj in self.new_objects if obj.pk is not None], using=using)
+            for obj in self.new_objects:
+                if obj.pk is None:
+                    obj.save(force_insert=True, using=using)
+        return self.new_objects + [obj for obj, changed_data in self.changed_objects]
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Cache the choices of the relation fields listed in the `cached_choices` key of
+the fieldset configs:
+
+    class FieldsetsConfig:
+        categories = Config(inline="ArticleToCategoryInline", cached_choices=["category"])
+
+The choices of a queryset are evaluated once, and shared by every form of
+the page and by the next requests, until an object of the model is saved or
+deleted. Use it for small lookup tables, with the default labels
+(`unicode(obj)`).
+
+The choices are kept in the process, or in the cache named by the
+ADMIN_TABS_CHOICES_CACHE setting (eg. "default"). Only the latter is
+invalidated in every process: with several processes and no cache, the
+choices kept in the process are dropped every ADMIN_TABS_CHOICES_TTL
+seconds (PROCESS_CHOICES_TTL by default, None to keep them).
+"""
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.db.models import signals
+from django.db.models.query import EmptyQuerySet
+from django.db.models.sql.datastructures import EmptyResultSet
+from django.utils.encoding import smart_str
+
+CACHE_KEY_PREFIX = "admin_tabs_choices"
+
+# Seconds the choices are kept in the process when no cache is set
+PROCESS_CHOICES_TTL = 300
+
+# Seconds the versions are kept in the cache: Django 1.4 has no timeout
+# meaning "never expire", and a version reseeded after being evicted anyway
+VERSION_TIMEOUT = 365 * 24 * 3600
+
+# {model label: (process version, {query key: choices})}, when no cache is set
+_process_choices = {}
+# {model label: version}, incremented when the choices are invalidated
+_process_versions = {}
+# Incremented by clear_cached_choices
+_process_generation = [0]
+# Held to read and write the three above
+_process_lock = threading.Lock()
+
+
+def get_choices_cache():
+    """
+    Returns the cache set by ADMIN_TABS_CHOICES_CACHE, or None.
+    """
+    alias = getattr(settings, "ADMIN_TABS_CHOICES_CACHE", None)
+    if alias is None:
+        return None
+    return get_cache(alias)
+
+
+def get_process_version(label):
+    """
+    Returns the version of the choices of the model `label` kept in the
+    process, which changes when they are invalidated or cleared, and every
+    ADMIN_TABS_CHOICES_TTL seconds.
+    """
+    ttl = getattr(settings, "ADMIN_TABS_CHOICES_TTL", PROCESS_CHOICES_TTL)
+    period = int(time.time() // ttl) if ttl else 0
+    return (_process_generation[0], _process_versions.get(label, 0), period)
+
+
+def get_version_seed():
+    """
+    Returns the first version of the choices kept in the cache, which is not
+    one of the versions used before the version key was evicted or expired.
+    """
+    return int(time.time() * 1000)
+
+
+def get_cache_version(cache, label):
+    """
+    Returns the version of the choices of the model `label` kept in `cache`,
+    seeding it when it is not set.
+    """
+    version_key = "%s:%s:version" % (CACHE_KEY_PREFIX, label)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, get_version_seed(), VERSION_TIMEOUT)
+        version = cache.get(version_key)
+    return version
+
+
+def model_label(model):
+    opts = model._meta
+    return "%s.%s" % (opts.app_label, opts.object_name.lower())
+
+
+def get_cached_choices(field):
+    """
+    Returns the (value, label) choices of the objects of the queryset of the
+    model choice `field`, without the empty choice.
+    """
+    queryset = field.queryset
+    query_key = get_query_key(queryset)
+    if query_key is None:
+        return []
+    label = model_label(queryset.model)
+    cache = get_choices_cache()
+    if cache is None:
+        with _process_lock:
+            version = get_process_version(label)
+            bucket_version, bucket = _process_choices.get(label, (None, None))
+            if bucket_version != version:
+                bucket = {}
+                _process_choices[label] = (version, bucket)
+            choices = bucket.get(query_key)
+        if choices is None:
+            choices = evaluate_choices(field)
+            with _process_lock:
+                # Not if the choices were invalidated while being evaluated
+                if get_process_version(label) == version:
+                    bucket[query_key] = choices
+        return choices
+    version = get_cache_version(cache, label)
+    key = "%s:%s:%s:%s" % (CACHE_KEY_PREFIX, label, version, query_key)
+    choices = cache.get(key)
+    if choices is None:
+        choices = evaluate_choices(field)
+        cache.set(key, choices)
+    return choices
+
+
+def get_query_key(queryset):
+    """
+    Returns a hash of the database and query of `queryset`, or None if it is
+    empty.
+    """
+    if isinstance(queryset, EmptyQuerySet):
+        return None
+    try:
+        return hashlib.md5(smart_str(u"%s:%s" % (queryset.db, queryset.query))).hexdigest()
+    except EmptyResultSet:  # eg. a pk__in=[] filter
+        return None
+
+
+def get_choices_key(queryset):
+    """
+    Returns a key changing with the choices of `queryset`: the label and the
+    choices version of its model, and its query key.
+    """
+    label = model_label(queryset.model)
+    cache = get_choices_cache()
+    if cache is None:
+        with _process_lock:
+            version = get_process_version(label)
+    else:
+        version = get_cache_version(cache, label)
+    return (label, version, get_query_key(queryset))
+
+
+def evaluate_choices(field):
+    return [(field.prepare_value(obj), field.label_from_instance(obj)) for obj in field.queryset.all()]
+
+
+def invalidate_choices(sender, **kwargs):
+    """
+    post_save and post_delete receiver, dropping the cached choices of the
+    `sender` model.
+    """
+    label = model_label(sender)
+    with _process_lock:
+        _process_choices.pop(label, None)
+        _process_versions[label] = _process_versions.get(label, 0) + 1
+    cache = get_choices_cache()
+    if cache is not None:
+        version_key = "%s:%s:version" % (CACHE_KEY_PREFIX, label)
+        try:
+            cache.incr(version_key)
+        except ValueError:  # Not set yet, or evicted
+            cache.set(version_key, get_version_seed(), VERSION_TIMEOUT)
+
+
+def clear_cached_choices():
+    """
+    Drop the choices cached in the process, eg. between tests: the rows
+    rolled back by a test do not invalidate them.
+    """
+    with _process_lock:
+        _process_choices.clear()
+        _process_generation[0] += 1
+
+
+def register_cached_choices(model):
+    """
+    Invalidate the cached choices of `model` when one of its objects is saved
+    or deleted.
+    """
+    dispatch_uid = "admin_tabs_choices_%s" % model_label(model)
+    signals.post_save.connect(invalidate_choices, sender=model, dispatch_uid=dispatch_uid)
+    signals.post_delete.connect(invalidate_choices, sender=model, dispatch_uid=dispatch_uid)
+
+
+class CachedChoicesFormMixin(object):
+    """
+    Form mixin setting the cached choices of the `cached_choices_fields`.
+
+    The choices keys (see get_choices_key) of the fields, read before their
+    choices, are kept in `cached_choices_keys`.
+    """
+    cached_choices_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super(CachedChoicesFormMixin, self).__init__(*args, **kwargs)
+        self.cached_choices_keys = {}
+        for name in self.cached_choices_fields:
+            field = self.fields.get(name)
+            if field is None or not hasattr(field, "queryset"):
+                continue
+            self.cached_choices_keys[name] = get_choices_key(field.queryset)
+            choices = get_cached_choices(field)
+            if getattr(field, "empty_label", None) is not None:
+                choices = [(u"", field.empty_label)] + choices
+            # Also set on the admin RelatedFieldWidgetWrapper
+            field.choices = choices
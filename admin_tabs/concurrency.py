@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Optimistic concurrency control for the tabbed change forms.
+
+The change form embeds a version token: a short hash of the initial value
+of each field of the form and, if the model has one, the value of its
+version field. When the form is posted, the token is compared to the row
+loaded by the view: the fields changed in between get an error, so the
+editor sees which tabs are affected. No lock is held while editing.
+
+With a version field, the save also checks the version with a conditional
+`UPDATE ... SET version = version + 1 WHERE pk = ... AND version = ...`.
+"""
+import hashlib
+
+from django import forms
+from django.db.models import F
+from django.utils.encoding import force_unicode, smart_str
+from django.utils.translation import ugettext as _
+
+# Name of the hidden form field holding the version token
+VERSION_TOKEN_FIELD = "admin_tabs_version"
+
+
+class VersionConflict(Exception):
+    """
+    The object was saved by someone else between the validation of the form
+    and its save.
+    """
+
+
+def make_version_token(version, values):
+    """
+    Returns the token of `version` (None without version field) and of the
+    `values` dict.
+    """
+    return "%s|%s" % (
+        "" if version is None else version,
+        ",".join("%s:%s" % (name, value_hash(values[name])) for name in sorted(values))
+    )
+
+
+def parse_version_token(token):
+    """
+    Returns the (version, {field name: hash}) tuple of `token`.
+    """
+    version, hashes = token.split("|", 1)
+    return version or None, dict(item.split(":", 1) for item in hashes.split(",") if item)
+
+
+def value_hash(value):
+    """
+    Short hash of a form initial value. The values of a list (eg. the pks of
+    a many to many field) are sorted, their order is not significant.
+    """
+    if isinstance(value, (list, tuple)):
+        value = u",".join(sorted(force_unicode(item) for item in value))
+    return hashlib.md5(smart_str(force_unicode(value))).hexdigest()[:8]
+
+
+def parse_version(version):
+    """
+    Returns the integer `version` of a token, or raises ValueError.
+    """
+    if version is None or not version.isdigit():
+        raise ValueError("Invalid version %r" % version)
+    return int(version)
+
+
+class VersionedFormMixin(object):
+    """
+    ModelForm mixin adding the version token and checking it.
+
+    `version_field` is the name of the version field of the model, or None.
+    """
+    version_field = None
+
+    def __init__(self, *args, **kwargs):
+        super(VersionedFormMixin, self).__init__(*args, **kwargs)
+        self.fields[VERSION_TOKEN_FIELD] = forms.CharField(widget=forms.HiddenInput, required=False)
+        if self.instance.pk is not None:
+            self.initial[VERSION_TOKEN_FIELD] = self.get_version_token()
+        self.submitted_version = None
+
+    def get_version(self):
+        if self.version_field is None:
+            return None
+        return getattr(self.instance, self.version_field)
+
+    def get_versioned_fields(self):
+        """
+        Names of the fields whose value is hashed in the token.
+        """
+        model_fields = set(f.name for f in self.instance._meta.fields + self.instance._meta.many_to_many)
+        return [
+            name for name in self.fields
+            if name in model_fields and name != self.version_field
+        ]
+
+    def get_version_token(self):
+        values = dict((name, self.initial.get(name)) for name in self.get_versioned_fields())
+        return make_version_token(self.get_version(), values)
+
+    def clean(self):
+        cleaned_data = super(VersionedFormMixin, self).clean()
+        token = self.cleaned_data.get(VERSION_TOKEN_FIELD)
+        if self.instance.pk is None or not token:
+            return cleaned_data
+        try:
+            version, hashes = parse_version_token(token)
+            if self.version_field is not None:
+                parse_version(version)
+        except ValueError:
+            # A tampered token: handled as a conflict, the current token is
+            # sent back
+            version, hashes = None, {}
+            valid_token = False
+        else:
+            valid_token = True
+        self.submitted_version = version
+        # self.instance still holds the values loaded by the view
+        current_version = self.get_version()
+        changed_fields = [
+            name for name in self.get_versioned_fields()
+            if name in hashes and hashes[name] != value_hash(self.initial.get(name))
+        ]
+        if valid_token and not changed_fields and (version is None or version == force_unicode(current_version)):
+            return cleaned_data
+        for name in changed_fields:
+            self._errors[name] = self.error_class([
+                _("This field was changed by someone else since you opened this page.")
+            ])
+            cleaned_data.pop(name, None)
+        # Send the current token back: posting the form again overwrites
+        # the changes of the other user
+        self.data = self.data.copy()
+        self.data[self.add_prefix(VERSION_TOKEN_FIELD)] = self.get_version_token()
+        raise forms.ValidationError(_("This object was changed by someone else since you opened this page. Check your changes and save again."))
+
+
+def claim_version(model, obj, version_field, version):
+    """
+    Increment the version of `obj` if it is still `version`, or raise
+    VersionConflict. An invalid `version` is a conflict too.
+    """
+    try:
+        version = parse_version(force_unicode(version))
+    except ValueError:
+        raise VersionConflict()
+    updated = model._default_manager.filter(**{
+        "pk": obj.pk,
+        version_field: version,
+    }).update(**{version_field: F(version_field) + 1})
+    if not updated:
+        raise VersionConflict()
+    setattr(obj, version_field, version + 1)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Ready made predicates to use in the `visible` key of the TabsConfig,
+ColsConfig and FieldsetsConfig entries, and in the `enabled` key of the
+TabsConfig entries.
+
+A predicate is any callable taking `(request, obj)` and returning a boolean.
+`obj` is the edited instance, or None in the add view.
+
+The bulk edit actions apply to many existing objects at once: they use the
+`bulk_outcome` attribute of the predicates depending on the object, and call
+the other ones with `obj=None`.
+
+    class ArticlePageConfig(TabbedPageConfig):
+        class FieldsetsConfig:
+            stats = Config(fields=["hits"], visible=obj_attr("is_online"))
+
+        class TabsConfig:
+            relations = Config(cols=["relations_col"], enabled=user_in_group("editors"))
+"""
+
+
+def add_only(request, obj):
+    """
+    True in the add view only.
+    """
+    return obj is None
+add_only.bulk_outcome = False
+
+
+def change_only(request, obj):
+    """
+    True in the change view only.
+    """
+    return obj is not None
+change_only.bulk_outcome = True
+
+
+def obj_attr(name):
+    """
+    True when the edited object has a truthy `name` attribute.
+    Always False in the add view, always True in the bulk edit actions.
+    """
+    def predicate(request, obj):
+        return obj is not None and bool(getattr(obj, name))
+    predicate.bulk_outcome = True
+    return predicate
+
+
+def user_in_group(*group_names):
+    """
+    True when the current user belongs to one of the given groups.
+
+    The group names of the user are fetched once per request.
+    """
+    def predicate(request, obj):
+        user = request.user
+        if not hasattr(user, "_admin_tabs_groups"):
+            if user.is_authenticated():
+                user._admin_tabs_groups = set(user.groups.values_list("name", flat=True))
+            else:
+                user._admin_tabs_groups = set()
+        return bool(user._admin_tabs_groups.intersection(group_names))
+    return predicate
+
+
+def user_has_perm(perm):
+    """
+    True when the current user has the `perm` permission ("app_label.codename").
+    """
+    def predicate(request, obj):
+        return request.user.has_perm(perm)
+    return predicate
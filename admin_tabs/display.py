@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Format the fields and inlines of an object without building any form, for
+the display only change view of TabbedModelAdmin.
+"""
+from django.contrib.admin.templatetags.admin_list import _boolean_icon
+from django.contrib.admin.util import display_for_field, flatten_fieldsets, label_for_field, lookup_field
+from django.contrib.admin.views.main import EMPTY_CHANGELIST_VALUE
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from django.db.models.fields.related import ManyToManyRel
+from django.forms.models import _get_foreign_key
+from django.utils.encoding import smart_unicode
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+
+
+def display_value(obj, name, model_admin=None):
+    """
+    Returns the value of the field, attribute or model admin method `name`
+    of `obj`, formatted as a readonly field of the change form.
+    """
+    try:
+        f, attr, value = lookup_field(name, obj, model_admin)
+    except (AttributeError, ValueError, ObjectDoesNotExist):
+        return EMPTY_CHANGELIST_VALUE
+    if f is None:
+        if getattr(attr, "boolean", False):
+            result_repr = _boolean_icon(value)
+        else:
+            result_repr = smart_unicode(value)
+            if getattr(attr, "allow_tags", False):
+                result_repr = mark_safe(result_repr)
+    elif value is None:
+        result_repr = EMPTY_CHANGELIST_VALUE
+    elif isinstance(f.rel, ManyToManyRel):
+        result_repr = ", ".join(map(unicode, value.all()))
+    else:
+        result_repr = display_for_field(value, f)
+    return conditional_escape(result_repr)
+
+
+def display_fields(obj, fields, model_admin=None):
+    """
+    Returns a list of (label, contents) for the `fields` of a fieldset.
+    """
+    return [
+        (label_for_field(name, obj.__class__, model_admin), display_value(obj, name, model_admin))
+        for name in flatten_fieldsets([(None, {"fields": fields})])
+    ]
+
+
+def get_inline_fields(request, inline, obj=None):
+    """
+    Returns the names of the fields displayed by `inline`, without building
+    its formset.
+    """
+    fk = _get_foreign_key(inline.parent_model, inline.model, fk_name=inline.fk_name)
+    if inline.declared_fieldsets:
+        fields = flatten_fieldsets(inline.declared_fieldsets)
+    else:
+        exclude = inline.exclude or ()
+        fields = [
+            f.name for f in inline.model._meta.fields + inline.model._meta.many_to_many
+            if f.editable and not isinstance(f, models.AutoField)
+                and f.name != fk.name and f.name not in exclude
+        ]
+    return fields + [name for name in inline.get_readonly_fields(request, obj) if name not in fields]
+
+
+def get_display_queryset(request, inline, obj):
+    """
+    Returns the objects of `inline` related to `obj` in the display view.
+
+    Defaults to inline.queryset(), overrides included, as if the user could
+    change the objects: the display view only lists the inlines the user may
+    view. Define a get_display_queryset(request, obj) method on the inline
+    to return other objects.
+    """
+    if hasattr(inline, "get_display_queryset"):
+        return inline.get_display_queryset(request, obj)
+    fk = _get_foreign_key(inline.parent_model, inline.model, fk_name=inline.fk_name)
+    if inline.has_change_permission(request):
+        queryset = inline.queryset(request)
+    else:
+        # InlineModelAdmin.queryset is empty without the change permission
+        inline.has_change_permission = lambda request, obj=None: True
+        try:
+            queryset = inline.queryset(request)
+        finally:
+            del inline.has_change_permission
+    return queryset.filter(**{fk.name: obj})
+
+
+def display_inline(request, inline, obj):
+    """
+    Returns a tuple ([label, ...], [[contents, ...], ...]) of the objects of
+    `inline` related to `obj` (see get_display_queryset).
+
+    The related objects are fetched in a single query, along with the
+    objects of their foreign keys.
+    """
+    fields = get_inline_fields(request, inline, obj)
+    related = [
+        name for name in fields
+        if name in inline.model._meta.get_all_field_names()
+            and isinstance(inline.model._meta.get_field_by_name(name)[0], models.ForeignKey)
+    ]
+    queryset = get_display_queryset(request, inline, obj)
+    if related:
+        queryset = queryset.select_related(*related)
+    labels = [label_for_field(name, inline.model, inline) for name in fields]
+    rows = [[display_value(related_obj, name, inline) for name in fields] for related_obj in queryset]
+    return labels, rows
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Render once the widgets of the empty form of the inline formsets, the
+"Add another" template row rendered on every change form.
+
+The widgets of the empty form only depend on the inline class, the
+permissions of the user (eg. the "add" link of the related widgets), the
+language and, for the relation fields, the choices. Their HTML is kept in a
+dict of the model admin, see TabbedModelAdmin.cache_empty_forms.
+
+The foreign key to the parent object, the fields with a callable initial
+value (eg. a timestamp) and the relation fields whose choices are not cached
+(see admin_tabs.choices) are still rendered on each request.
+"""
+from django.forms.forms import BoundField
+from django.utils.translation import get_language
+
+from admin_tabs import metrics
+
+
+class CachedBoundField(BoundField):
+    """
+    BoundField whose widget HTML is kept in `cache` under `key`.
+    """
+    def __init__(self, form, field, name, cache, key, version):
+        super(CachedBoundField, self).__init__(form, field, name)
+        self.cache = cache
+        self.key = key
+        self.version = version
+
+    def __unicode__(self):
+        version, html = self.cache.get(self.key, (None, None))
+        if html is None or version != self.version:
+            metrics.incr("empty_form_cache.miss")
+            html = super(CachedBoundField, self).__unicode__()
+            self.cache[self.key] = (self.version, html)
+        else:
+            metrics.incr("empty_form_cache.hit")
+        return html
+
+
+class CachedEmptyFormMixin(object):
+    """
+    Form mixin returning CachedBoundFields once `empty_form_cache` is set,
+    on the empty form only. The relation fields are only cached with
+    CachedChoicesFormMixin, which sets their `cached_choices_keys`.
+    """
+    empty_form_cache = None
+    empty_form_key = None
+    uncached_fields = ()
+    cached_choices_fields = ()
+
+    def __getitem__(self, name):
+        bound_field = super(CachedEmptyFormMixin, self).__getitem__(name)
+        if self.empty_form_cache is None:
+            return bound_field
+        field = bound_field.field
+        if (name in self.uncached_fields or callable(field.initial)
+                or field.show_hidden_initial):
+            return bound_field
+        version = None
+        if hasattr(field, "queryset"):
+            # Read before the choices were evaluated: the choices saved
+            # meanwhile change the key
+            version = getattr(self, "cached_choices_keys", {}).get(name)
+            if version is None:
+                return bound_field
+        return CachedBoundField(self, field, name, self.empty_form_cache,
+            self.empty_form_key + (get_language(), name), version)
+
+
+class CachedEmptyFormFormSetMixin(object):
+    """
+    Inline formset mixin caching the widgets of its empty form in
+    `empty_form_cache`, under keys starting with `empty_form_key`. Its form
+    must inherit CachedEmptyFormMixin.
+    """
+    empty_form_cache = None
+    empty_form_key = ()
+
+    @property
+    def empty_form(self):
+        form = self._get_empty_form()
+        form.empty_form_cache = self.empty_form_cache
+        form.empty_form_key = self.empty_form_key
+        form.uncached_fields = (self.fk.name,)
+        return form
@@ -1,8 +1,34 @@
 # -*- coding: utf-8 -*-
-from django.contrib.admin.helpers import AdminForm, Fieldset
+from functools import partial
+
+from django.contrib.admin.helpers import AdminErrorList, AdminForm, Fieldset, InlineAdminFormSet, ACTION_CHECKBOX_NAME
 from django.contrib.admin import ModelAdmin
+from django.contrib.admin.models import LogEntry, CHANGE
 from django.contrib.admin.options import csrf_protect_m
-from django.db import transaction
+from django.contrib.admin.util import flatten_fieldsets, unquote, model_ngettext
+from django.contrib.admin.views.main import IS_POPUP_VAR
+from django.contrib.admin.widgets import AdminDateWidget, AdminSplitDateTime, AdminTimeWidget
+from django.contrib.contenttypes.models import ContentType
+from django.contrib import messages
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django import forms
+from django.conf import settings
+from django.db import connection, connections, models, router, transaction, DatabaseError, IntegrityError
+from django.forms.models import modelform_factory
+from django.template.loader import select_template
+from django.template.response import TemplateResponse
+from django.utils import simplejson
+from django.utils.datastructures import SortedDict
+from django.utils.encoding import force_unicode, smart_unicode
+from django.utils.text import get_text_list
+from django.utils.translation import ugettext as _
+
+from admin_tabs.bulk import auto_now_values, bulk_create, bulk_update, model_has_save_hooks, BulkSaveFormSetMixin
+from admin_tabs.choices import CachedChoicesFormMixin, register_cached_choices
+from admin_tabs.concurrency import VersionConflict, VersionedFormMixin, claim_version
+from admin_tabs.emptyforms import CachedEmptyFormFormSetMixin, CachedEmptyFormMixin
+from admin_tabs import metrics
+from admin_tabs.profiling import Measure, get_profile, start_profile, stop_profile
 
 class AdminCol(object):
     """
@@ -66,14 +92,46 @@ class AdminCol(object):
             col_elements.append(col_element)
         return col_elements
 
+    def get_media(self, request, form, inline_admin_formsets, obj=None, widget_classes=None):
+        """
+        Returns the Media of the fieldsets, widgets and inlines of the col.
+
+        `widget_classes`: only the media of the fieldsets and of the widgets
+        of these classes, without the inlines
+        """
+        inline_matching = dict((inline.opts.__class__.__name__, inline) for inline in inline_admin_formsets)
+        media = forms.Media()
+        for name, options in self.get_elements(request, obj, include_inlines=True):
+            if "fields" in options:
+                media = media + Fieldset(form, name, **options).media
+                for field_name in flatten_fieldsets([(name, options)]):
+                    if field_name in form.fields:  # Not readonly
+                        widget = form.fields[field_name].widget
+                        if widget_classes is None or isinstance(widget, widget_classes):
+                            media = media + widget.media
+            elif options["inline"] in inline_matching and widget_classes is None:
+                media = media + inline_matching[options["inline"]].media
+        return media
+
+    def get_fields(self, request, obj=None):
+        """
+        Returns the names of the fields of the col.
+        """
+        return flatten_fieldsets(self.get_elements(request, obj))
+
 
 class AdminTab(object):
     """
     One Tab in the admin pages.
     """
-    def __init__(self, name, cols, enabled=True):
+    def __init__(self, name, cols, enabled=True, bulk_edit=False):
+        """
+        `bulk_edit`: offer a changelist action to edit the fields of this tab
+        on the selected objects
+        """
         self.name = name
         self.enabled = enabled
+        self.bulk_edit = bulk_edit
         self._cols = {}
         for idx, col in enumerate(cols):
             self.add_col(col, idx)
@@ -106,8 +164,23 @@ class AdminTab(object):
         """
         return self._cols[item]
     
-    def medias(self):
-        return 
+    def get_media(self, request, form, inline_admin_formsets, obj=None, widget_classes=None):
+        """
+        Returns the Media of the cols of the tab, see AdminCol.get_media.
+        """
+        media = forms.Media()
+        for col in self:
+            media = media + col.get_media(request, form, inline_admin_formsets, obj, widget_classes)
+        return media
+
+    def get_fields(self, request, obj=None):
+        """
+        Returns the names of the fields of the cols of the tab.
+        """
+        fields = []
+        for col in self:
+            fields.extend(col.get_fields(request, obj))
+        return fields
 
 class AdminFieldsetConfig(object):
     """
@@ -117,8 +190,14 @@ class AdminFieldsetConfig(object):
     
     It can be a real Fieldset or an Inline.
     """
-    def __init__(self, fields=None, inline=None, name=None, css_classes=None, description=None):
+    def __init__(self, fields=None, inline=None, name=None, css_classes=None, description=None,
+            cached_choices=None):
+        """
+        `cached_choices`: names of the relation fields, of the fieldset or of
+        the inline forms, whose choices are cached (see admin_tabs.choices)
+        """
         self.description = description
+        self.cached_choices = cached_choices or []
         self.css_classes = css_classes or []
         self.fields = fields
         self.inline = inline
@@ -131,6 +210,84 @@ class AdminFieldsetConfig(object):
         return getattr(self, item)
 
 
+# Suffix of the hidden input rendered after each inline formset: the tabs
+# javascript sets it to "1" as soon as one of the formset inputs is modified
+INLINE_DIRTY_MARKER = "ADMIN_TABS_DIRTY"
+
+
+class SkipUnchangedFormSetMixin(object):
+    """
+    Inline formset mixin skipping validation and saving when the formset is
+    reported as untouched by the client and has_changed() confirms it.
+
+    The whole validation is skipped, including the clean() method of the
+    formset: leave it out for the formsets whose clean() checks more than
+    the submitted rows (eg. a minimum number of rows, or a rule depending on
+    the parent object).
+    """
+    def is_untouched(self):
+        if not hasattr(self, "_untouched"):
+            self._untouched = (
+                self.is_bound
+                and not getattr(self, "save_as_new", False)
+                and self.data.get("%s-%s" % (self.prefix, INLINE_DIRTY_MARKER)) == "0"
+                and not self.has_changed()
+            )
+        return self._untouched
+
+    def is_valid(self):
+        if self.is_untouched():
+            return True
+        return super(SkipUnchangedFormSetMixin, self).is_valid()
+
+    def save(self, commit=True):
+        if self.is_untouched():
+            # Used by ModelAdmin.construct_change_message
+            self.new_objects = []
+            self.changed_objects = []
+            self.deleted_objects = []
+            return []
+        return super(SkipUnchangedFormSetMixin, self).save(commit)
+
+
+def media_urls(media, loaded=None):
+    """
+    Returns the urls of the scripts and stylesheets of `media` which are not
+    in the `loaded` Media, as a {"js": [url, ...], "css": [[medium, url], ...]}
+    dict.
+    """
+    loaded = loaded or forms.Media()
+    loaded_css = set(path for paths in loaded._css.values() for path in paths)
+    return {
+        "js": [media.absolute_path(path) for path in media._js if path not in loaded._js],
+        "css": [
+            [medium, media.absolute_path(path)]
+            for medium in sorted(media._css) for path in media._css[medium]
+            if path not in loaded_css
+        ],
+    }
+
+
+# Name of the checkboxes selecting the fields to set in the bulk edit action
+BULK_EDIT_FIELDS_NAME = "_bulk_edit_fields"
+
+
+# Transaction strategies of TabbedModelAdmin.change_view and add_view:
+# - the whole view in a transaction
+TRANSACTION_PER_REQUEST = "request"
+# - only POST requests in a transaction, the read transaction of GET requests
+#   is closed before rendering the template
+TRANSACTION_ON_POST = "post"
+# - as TRANSACTION_ON_POST, with the inlines of each tab saved in their own
+#   savepoint (see TabbedModelAdmin.save_related)
+TRANSACTION_TAB_SAVEPOINTS = "tab_savepoints"
+
+
+# Config keys which accept a boolean or a predicate `(request, obj) -> bool`:
+# `visible` on the tabs, cols and fieldsets, `enabled` on the tabs only
+CONDITION_KEYS = ("visible", "enabled")
+
+
 class Config(dict):
     """
     Basic extension of a dict object to manage the attributes order in class
@@ -241,6 +398,33 @@ class MetaAdminPageConfig(type):
             tabs_order = [attr for attr in dir(it.TabsConfig) if not attr.startswith('_')]
             tabs_order.sort(key=lambda attr: getattr(it.TabsConfig, attr).creation_counter)
             setattr(it.TabsConfig, "tabs_order", tabs_order)
+
+        # --- Collect the predicates declared in the config classes, in a
+        # stable order: their outcomes are the key of the layout variants
+        conditions = []
+        for config_class_name in ("FieldsetsConfig", "ColsConfig", "TabsConfig"):
+            config_class = getattr(it, config_class_name)
+            for attr_name in sorted(dir(config_class)):
+                attr = getattr(config_class, attr_name)
+                if not isinstance(attr, Config): continue
+                if "enabled" in attr and config_class_name != "TabsConfig":
+                    # Only the tabs can be disabled
+                    raise ImproperlyConfigured("%s.%s.%s: `enabled` is only supported by the "
+                        "tabs, use `visible` instead" % (name, config_class_name, attr_name))
+                for key in CONDITION_KEYS:
+                    if callable(attr.get(key)):
+                        conditions.append((config_class_name, attr_name, key))
+        it.conditions = tuple(conditions)
+
+        # --- Collect the fields with cached choices, as a dict
+        # {inline name or None: set of field names}
+        cached_choices = {}
+        for attr_name in dir(it.FieldsetsConfig):
+            attr = getattr(it.FieldsetsConfig, attr_name)
+            if not isinstance(attr, Config): continue
+            if attr.get("cached_choices"):
+                cached_choices.setdefault(attr.get("inline"), set()).update(attr["cached_choices"])
+        it.cached_choices = cached_choices
         return it
 
 class TabbedPageConfig(object):
@@ -253,7 +437,11 @@ class TabbedPageConfig(object):
     class ColsConfig(object): pass
     class TabsConfig(object): pass
     
-    def __init__(self, request, model_admin, obj_or_id=None):
+    def __init__(self, request, model_admin, obj_or_id=None, outcomes=None):
+        """
+        `outcomes` is the result of `evaluate_conditions` for this variant of
+        the layout; it is computed from `request` and `obj_or_id` if omitted.
+        """
         # Create these inner classes at runtime
         # to prevent from sharing them between instances
         self.Fields = type("Fields", (object,), {})
@@ -263,11 +451,22 @@ class TabbedPageConfig(object):
                             # TODO: instanciate also Fields and Cols?
         self.model_admin = model_admin
         self.request=request
+        if outcomes is None:
+            outcomes = self.evaluate_conditions(request, obj_or_id)
+        self.outcomes = outcomes
+        self._outcomes = dict(zip(self.conditions, outcomes))
+        # Names of the fieldsets and cols removed by their `visible` predicate
+        hidden_fieldsets = set()
+        hidden_cols = set()
         # Populate the fieldsets
         for f in dir(self.FieldsetsConfig):
             if f.startswith("_"): continue
             fields = getattr(self.FieldsetsConfig, f)
             if not fields: continue
+            fields = self._resolve_conditions("FieldsetsConfig", f, fields)
+            if not fields.pop("visible", True):
+                hidden_fieldsets.add(f)
+                continue
             fieldsetconfig = AdminFieldsetConfig(**fields)
             setattr(self.Fields, f, fieldsetconfig)
         # Put AdminCols instance in self.Cols
@@ -277,9 +476,12 @@ class TabbedPageConfig(object):
             # and we are making change on it
             cols = getattr(self.ColsConfig, f)
             if not cols: continue
-            ColsConfig = dict(cols)
+            ColsConfig = self._resolve_conditions("ColsConfig", f, cols)
+            if not ColsConfig.pop("visible", True):
+                hidden_cols.add(f)
+                continue
             # We want AdminFieldsetConfig instances, not names 
-            ColsConfig['fieldsets'] = map(lambda k: getattr(self.Fields, k), ColsConfig['fieldsets']) 
+            ColsConfig['fieldsets'] = [getattr(self.Fields, k) for k in ColsConfig['fieldsets'] if k not in hidden_fieldsets]
             # Col instance need to know about its AdminFormConfig parent
 #            ColsConfig["page_config"] = self
             setattr(self.Cols, f, AdminCol(**ColsConfig))
@@ -290,10 +492,62 @@ class TabbedPageConfig(object):
             # and we are making change on it
             tabs = getattr(self.TabsConfig, f)
             if not tabs: continue
-            tabconfig = dict(tabs)
+            tabconfig = self._resolve_conditions("TabsConfig", f, tabs)
+            if not tabconfig.pop("visible", True): continue
             # We want ColsConfig instances, not names
-            tabconfig['cols'] = map(lambda k: getattr(self.Cols, k), tabconfig['cols'])
+            tabconfig['cols'] = [getattr(self.Cols, k) for k in tabconfig['cols'] if k not in hidden_cols]
             setattr(self.Tabs, f, AdminTab(**tabconfig))
+        # Inlines which are not reachable anymore must not be processed by
+        # the model admin (see TabbedModelAdmin.get_inline_instances)
+        self.hidden_inlines = set()
+        for f in dir(self.FieldsetsConfig):
+            fields = getattr(self.FieldsetsConfig, f)
+            if isinstance(fields, Config) and fields.get("inline"):
+                self.hidden_inlines.add(fields["inline"])
+        for tab in self:
+            for col in tab:
+                for fieldset in col.fieldsets:
+                    self.hidden_inlines.discard(fieldset.inline)
+
+    @classmethod
+    def evaluate_conditions(cls, request, obj=None):
+        """
+        Returns the tuple of the outcomes of the predicates declared in the
+        config classes. Two requests with the same outcomes share the same
+        layout.
+        """
+        return tuple(
+            bool(getattr(getattr(cls, config_class_name), attr_name)[key](request, obj))
+            for config_class_name, attr_name, key in cls.conditions
+        )
+
+    @classmethod
+    def evaluate_bulk_conditions(cls, request):
+        """
+        Returns the outcomes of the predicates for the bulk edit actions: the
+        `bulk_outcome` of the predicates depending on the object (see
+        admin_tabs.conditions), the others being called with `obj=None`.
+        """
+        outcomes = []
+        for config_class_name, attr_name, key in cls.conditions:
+            predicate = getattr(getattr(cls, config_class_name), attr_name)[key]
+            outcome = getattr(predicate, "bulk_outcome", None)
+            if outcome is None:
+                outcome = predicate(request, None)
+            outcomes.append(bool(outcome))
+        return tuple(outcomes)
+
+    def _resolve_conditions(self, config_class_name, attr_name, config):
+        """
+        Returns a copy of `config` where the predicates are replaced by their
+        outcome.
+        """
+        config = dict(config)
+        for key in CONDITION_KEYS:
+            condition = (config_class_name, attr_name, key)
+            if condition in self._outcomes:
+                config[key] = self._outcomes[condition]
+        return config
 
     def __iter__(self):
         for attr in self.Tabs.tabs_order:
@@ -303,15 +557,79 @@ class TabbedPageConfig(object):
     def tabs(self):
         return self.__iter__()
 
+def permissions_key(user):
+    """
+    Returns a hashable value of the permissions of `user`.
+    """
+    if user.is_superuser:
+        return True
+    return frozenset(user.get_all_permissions())
+
+
 class TabbedModelAdmin(ModelAdmin):
     
     declared_fieldsets = []
     page_config_class = TabbedPageConfig
+    # Reuse the form and inline formset classes between requests sharing the
+    # same layout, readonly fields and permissions. Leave it to False if your
+    # formfield_for_* methods depend on something else in the request.
+    cache_form_classes = False
+    # Do not validate nor save the inline formsets left untouched by the user
+    # (see SkipUnchangedFormSetMixin). Their clean() method is not called
+    # either.
+    skip_unchanged_inlines = False
+    # Save the inline objects with bulk queries (see BulkSaveFormSetMixin)
+    bulk_save_inlines = False
+    # Render once the widgets of the empty form of the inlines, the "Add
+    # another" template row (see admin_tabs.emptyforms)
+    cache_empty_forms = False
+    bulk_edit_template = None
+    # How change_view and add_view use the database transactions, see the
+    # TRANSACTION_* constants
+    transaction_strategy = TRANSACTION_ON_POST
+    # Reject the changes made on an object saved by someone else since the
+    # change form was opened (see admin_tabs.concurrency). With a
+    # version_field, an integer field left out of the layout, the save is
+    # also checked with a conditional update of the version.
+    optimistic_locking = False
+    version_field = None
+    # Only load the media of the first enabled tab with the page, the media
+    # of the other tabs are listed in the `deferred_tab_media` context
+    # variable for the template to load them when the tab is first selected.
+    # Only the media of the fieldsets and of the deferrable_widgets are
+    # deferred: the other widgets may render inline scripts calling their
+    # media (eg. FilteredSelectMultiple), and the template only initializes
+    # DateTimeShortcuts once its scripts are loaded.
+    defer_tab_media = False
+    deferrable_widgets = (AdminDateWidget, AdminSplitDateTime, AdminTimeWidget)
+    display_form_template = None
+    # Only load the columns used by the layout when displaying an object
+    # (see get_layout_fields). List in layout_extra_fields the other fields
+    # read on the page, eg. by __unicode__, to save a query for each of them.
+    only_layout_fields = False
+    layout_extra_fields = ()
     def __init__(self, *args, **kwargs):
-        self._page_config = None  # For caching, warning, it'a class consistent
-                                  # Override get_page_config for changing Tabs 
-                                  # at run time
-        return super(TabbedModelAdmin, self).__init__(*args, **kwargs)
+        self._page_configs = {}  # For caching, warning, it's class consistent:
+                                 # one page config per outcome of the
+                                 # page_config_class conditions.
+                                 # Override get_page_config for changing Tabs 
+                                 # at run time
+        self._form_classes = {}  # See cache_form_classes
+        self._empty_forms = {}  # See cache_empty_forms
+        super(TabbedModelAdmin, self).__init__(*args, **kwargs)
+        inline_models = dict((inline.__name__, inline.model) for inline in self.inlines)
+        for inline_name, field_names in self.page_config_class.cached_choices.items():
+            model = self.model if inline_name is None else inline_models.get(inline_name)
+            if model is None: continue
+            for name in field_names:
+                try:
+                    field = model._meta.get_field(name)
+                except models.FieldDoesNotExist:
+                    field = None
+                if field is None or field.rel is None:
+                    raise ImproperlyConfigured("%s.cached_choices: %s.%s is not a relation field" % (
+                        self.page_config_class.__name__, model._meta.object_name, name))
+                register_cached_choices(field.rel.to)
 
     def get_page_config(self, request, obj_or_id=None, **kwargs):
         """
@@ -321,11 +639,98 @@ class TabbedModelAdmin(ModelAdmin):
         runtime.
         `obj_or_id` could be an instance or a pk or None (when you call it from a 
         change_view extended, you have only the pk).
+
+        The `visible` and `enabled` predicates of the page config class are
+        evaluated on each call, and a page config is built and cached for
+        each distinct tuple of outcomes.
         """
-        if self._page_config is None:
-            self._page_config = self.page_config_class(request, self, obj_or_id=obj_or_id)
-        return self._page_config
+        obj = obj_or_id
+        if self.page_config_class.conditions:
+            obj = self.resolve_object(request, obj)
+        outcomes = self.page_config_class.evaluate_conditions(request, obj)
+        page_config = self._page_configs.get(outcomes)
+        if page_config is None:
+            metrics.incr("page_config_cache.miss")
+            page_config = self.page_config_class(request, self, obj_or_id=obj, outcomes=outcomes)
+            self._page_configs[outcomes] = page_config
+        else:
+            metrics.incr("page_config_cache.hit")
+        return page_config
     
+    def get_layout_fields(self, request, obj=None):
+        """
+        Returns the names of the model fields used by the layout: the fields
+        of every fieldset of the page config, visible or not, the readonly
+        fields, the version field and the layout_extra_fields.
+        """
+        names = set(self.layout_extra_fields)
+        fieldsets_config = self.page_config_class.FieldsetsConfig
+        for attr_name in dir(fieldsets_config):
+            fieldset = getattr(fieldsets_config, attr_name)
+            if isinstance(fieldset, Config) and fieldset.get("fields"):
+                names.update(flatten_fieldsets([(None, {"fields": fieldset["fields"]})]))
+        names.update(self.get_readonly_fields(request, obj))
+        if self.version_field:
+            names.add(self.version_field)
+        return [field.name for field in self.opts.fields if field.name in names]
+
+    def get_object(self, request, object_id):
+        """
+        Returns the object `object_id`, or None. It is loaded once per
+        request: the page config, the forms and the template tags of a view
+        share the instance.
+        """
+        objects = getattr(request, "_admin_tabs_objects", None)
+        if objects is None:
+            objects = request._admin_tabs_objects = {}
+        key = (self, smart_unicode(object_id))
+        if key not in objects:
+            objects[key] = self.load_object(request, object_id)
+        return objects[key]
+
+    def forget_object(self, request, object_id):
+        """
+        Drop `object_id` from the objects loaded by the request, eg. to load
+        it again after a failed save.
+        """
+        getattr(request, "_admin_tabs_objects", {}).pop((self, smart_unicode(object_id)), None)
+
+    def resolve_object(self, request, obj_or_id):
+        """
+        Returns the instance of `obj_or_id`, an instance, a pk (quoted as in
+        the admin urls) or None.
+        """
+        if obj_or_id is None or isinstance(obj_or_id, models.Model):
+            return obj_or_id
+        return self.get_object(request, unquote(obj_or_id))
+
+    def get_view_object(self, request):
+        """
+        Returns the object of the current change view, or None.
+        """
+        return getattr(request, "_admin_tabs_object", None)
+
+    def load_object(self, request, object_id):
+        """
+        Fetch the object `object_id`, see get_object.
+
+        With only_layout_fields, the columns not used by the layout are
+        deferred, unless the object is to be saved: in Django 1.4, saving a
+        deferred instance loads each deferred field with its own query.
+        """
+        fields = None
+        if self.only_layout_fields and request.method != "POST":
+            fields = self.get_layout_fields(request)
+        if not fields:
+            return super(TabbedModelAdmin, self).get_object(request, object_id)
+        queryset = self.queryset(request).only(*fields)
+        model = queryset.model
+        try:
+            object_id = model._meta.pk.to_python(object_id)
+            return queryset.get(pk=object_id)
+        except (model.DoesNotExist, ValidationError):
+            return None
+
     def get_fieldsets(self, request, obj=None):
         fieldsets = []
         page_config = self.get_page_config(request, obj_or_id=obj)
@@ -334,30 +739,669 @@ class TabbedModelAdmin(ModelAdmin):
                 fieldsets += col.get_fieldsets(request, obj)
         return fieldsets
     
+    def _form_class_cache_key(self, request, obj, *args):
+        """
+        Returns the key of a form class in self._form_classes, or None if the
+        form classes must not be cached.
+        """
+        if not self.cache_form_classes:
+            return None
+        return (obj is None, self._permissions_key(request)) + args
+
+    def _permissions_key(self, request):
+        return permissions_key(request.user)
+
     def get_form(self, request, obj=None, **kwargs):
-        self.declared_fieldsets = self.get_fieldsets(request, obj)
-        return super(TabbedModelAdmin, self).get_form(request, obj, **kwargs)
+        cache_key = None
+        if self.cache_form_classes and not kwargs:
+            page_config = self.get_page_config(request, obj_or_id=obj)
+            cache_key = self._form_class_cache_key(request, obj, "form",
+                page_config.outcomes, tuple(self.get_readonly_fields(request, obj)))
+            if cache_key in self._form_classes:
+                metrics.incr("form_class_cache.hit")
+                return self._form_classes[cache_key]
+            metrics.incr("form_class_cache.miss")
+        # Pass the fields instead of setting self.declared_fieldsets: the
+        # model admin is shared between requests which may not use the same
+        # layout
+        fieldsets = self.get_fieldsets(request, obj)
+        if fieldsets:
+            kwargs.setdefault("fields", flatten_fieldsets(fieldsets))
+        form = super(TabbedModelAdmin, self).get_form(request, obj, **kwargs)
+        if self.optimistic_locking:
+            form = type(form.__name__, (VersionedFormMixin, form), {"version_field": self.version_field})
+        if self.page_config_class.cached_choices.get(None):
+            form = type(form.__name__, (CachedChoicesFormMixin, form), {
+                "cached_choices_fields": tuple(self.page_config_class.cached_choices[None])
+            })
+        if cache_key is not None:
+            self._form_classes[cache_key] = form
+        return form
+
+    def get_formsets(self, request, obj=None):
+        for inline in self.get_inline_instances(request):
+            cache_key = self._form_class_cache_key(request, obj, "formset",
+                inline.__class__, tuple(inline.get_readonly_fields(request, obj)))
+            if cache_key in self._form_classes:
+                metrics.incr("form_class_cache.hit")
+                yield self._form_classes[cache_key]
+                continue
+            if cache_key is not None:
+                metrics.incr("form_class_cache.miss")
+            formset = inline.get_formset(request, obj)
+            formset.inline_name = inline.__class__.__name__
+            mixins = []
+            if self.skip_unchanged_inlines:
+                mixins.append(SkipUnchangedFormSetMixin)
+            attrs = {}
+            if self.bulk_save_inlines:
+                mixins.append(BulkSaveFormSetMixin)
+                # Set on the inline or on its formset class, which comes after
+                # the mixin in the MRO
+                attrs["bulk_create_new_objects"] = (getattr(inline, "bulk_create_new_objects", False)
+                    or getattr(formset, "bulk_create_new_objects", False))
+            form_mixins = []
+            cached_choices = tuple(self.page_config_class.cached_choices.get(formset.inline_name, ()))
+            if cached_choices:
+                form_mixins.append(CachedChoicesFormMixin)
+            if self.cache_empty_forms:
+                mixins.append(CachedEmptyFormFormSetMixin)
+                form_mixins.append(CachedEmptyFormMixin)
+                attrs["empty_form_cache"] = self._empty_forms
+                attrs["empty_form_key"] = (obj is None, self._permissions_key(request),
+                    formset.inline_name, tuple(inline.get_readonly_fields(request, obj)))
+            if form_mixins:
+                form = type(formset.form.__name__, tuple(form_mixins) + (formset.form,), {
+                    "cached_choices_fields": cached_choices
+                })
+                # The metaclass builds the model fields again, without the
+                # widgets and options of the inline (raw_id_fields, ...)
+                form.base_fields = formset.form.base_fields
+                attrs["form"] = form
+            if mixins or attrs:
+                formset = type(formset.__name__, tuple(mixins) + (formset,), attrs)
+            if cache_key is not None:
+                self._form_classes[cache_key] = formset
+            yield formset
+
+    def get_inline_instances(self, request):
+        """
+        Leave out the inlines hidden by the page config of the current view.
+        """
+        inline_instances = super(TabbedModelAdmin, self).get_inline_instances(request)
+        page_config = getattr(request, "_admin_tabs_page_config", None)
+        if page_config is not None and page_config.hidden_inlines:
+            inline_instances = [
+                inline for inline in inline_instances
+                if inline.__class__.__name__ not in page_config.hidden_inlines
+            ]
+        return inline_instances
     
+    def warmup(self, request):
+        """
+        Build ahead of the first request the page configs, the form classes
+        and the templates of the add view and of the change view of the
+        warmup objects.
+
+        Called by admin_tabs.warmup.warmup(); `request` is a fake request.
+        """
+        templates = [
+            "admin/includes/fieldset.html",
+            self.change_form_template or [
+                "admin/%s/%s/change_form.html" % (self.opts.app_label, self.opts.object_name.lower()),
+                "admin/%s/change_form.html" % self.opts.app_label,
+                "admin/change_form.html"
+            ],
+        ]
+        for obj in [None] + list(self.get_warmup_objects(request)):
+            request._admin_tabs_page_config = self.get_page_config(request, obj_or_id=obj)
+            self.get_form(request, obj)
+            list(self.get_formsets(request, obj))
+            templates.extend(inline.template for inline in self.get_inline_instances(request))
+        for template_name in templates:
+            if isinstance(template_name, basestring):
+                template_name = [template_name]
+            select_template(template_name)
+
+    def get_warmup_objects(self, request):
+        """
+        Returns the objects whose change view is warmed up, the first one by
+        default. Override it to return an object of each layout variant.
+        """
+        return self.queryset(request)[:1]
+
+    def get_actions(self, request):
+        """
+        Add a bulk edit action for each tab marked with `bulk_edit`.
+        """
+        actions = super(TabbedModelAdmin, self).get_actions(request)
+        if self.actions is None or IS_POPUP_VAR in request.GET:
+            return actions
+        if not self.has_change_permission(request):
+            return actions
+        page_config = self.get_bulk_edit_page_config(request)
+        for tab_name in page_config.Tabs.tabs_order:
+            tab = getattr(page_config.Tabs, tab_name, None)
+            if tab is None or not tab.bulk_edit: continue
+            name = "bulk_edit_%s" % tab_name
+            description = _('Edit "%(tab)s" of selected %%(verbose_name_plural)s') % {
+                "tab": force_unicode(tab.name).replace("%", "%%")
+            }
+            actions[name] = (self._get_bulk_edit_action(tab_name), name, description)
+        return actions
+
+    def get_bulk_edit_page_config(self, request):
+        """
+        Returns the layout of the bulk edit actions, which apply to many
+        existing objects at once (see TabbedPageConfig.evaluate_bulk_conditions).
+        """
+        outcomes = self.page_config_class.evaluate_bulk_conditions(request)
+        page_config = self._page_configs.get(outcomes)
+        if page_config is None:
+            page_config = self.page_config_class(request, self, outcomes=outcomes)
+            self._page_configs[outcomes] = page_config
+        return page_config
+
+    def _get_bulk_edit_action(self, tab_name):
+        def bulk_edit(modeladmin, request, queryset):
+            return modeladmin.bulk_edit_view(request, queryset, tab_name)
+        return bulk_edit
+
+    def get_bulk_edit_fields(self, request, tab):
+        """
+        Returns the names of the fields of `tab` which can be set at once on
+        many objects: editable model fields, neither unique (alone or
+        together with other fields) nor files.
+        """
+        readonly_fields = self.get_readonly_fields(request)
+        unique_together = set(name for names in self.opts.unique_together for name in names)
+        fields = []
+        for col in tab:
+            for name in flatten_fieldsets(col.get_fieldsets(request)):
+                if name in readonly_fields or name in fields: continue
+                try:
+                    field = self.opts.get_field(name)
+                except models.FieldDoesNotExist:
+                    continue
+                if (not field.editable or field.unique or field.primary_key
+                        or name in unique_together or isinstance(field, models.FileField)):
+                    continue
+                fields.append(name)
+        return fields
+
+    def bulk_edit_view(self, request, queryset, tab_name):
+        """
+        Action view setting the fields of a tab on the selected objects.
+
+        The checked fields are written with batched UPDATE queries, in a
+        single transaction, unless the model has save hooks or a many to many
+        field is checked: the objects are then saved one by one.
+        """
+        opts = self.opts
+        tab = getattr(self.get_bulk_edit_page_config(request).Tabs, tab_name)
+        fields = self.get_bulk_edit_fields(request, tab)
+        BulkEditForm = modelform_factory(self.model, form=self.form, fields=fields,
+            formfield_callback=partial(self.formfield_for_dbfield, request=request))
+        checked_fields = []
+        if request.POST.get("post"):
+            checked_fields = [name for name in request.POST.getlist(BULK_EDIT_FIELDS_NAME) if name in fields]
+            form = BulkEditForm(request.POST, request.FILES)
+            # Only the checked fields are set
+            for name in fields:
+                if name not in checked_fields:
+                    form.fields[name].required = False
+            if not checked_fields:
+                self.message_user(request, _("Check the fields to change."))
+            elif form.is_valid():
+                try:
+                    count = self.bulk_edit(request, queryset, form, checked_fields)
+                except IntegrityError as e:
+                    # Rolled back by bulk_edit, eg. a constraint of the database
+                    self.message_user(request, _("The %(items)s could not be changed: %(error)s") % {
+                        "items": opts.verbose_name_plural, "error": e
+                    })
+                else:
+                    self.message_user(request, _("Successfully changed %(count)d %(items)s.") % {
+                        "count": count, "items": model_ngettext(opts, count)
+                    })
+                    return None
+        else:
+            form = BulkEditForm()
+        context = {
+            "title": _("Edit %s") % force_unicode(tab.name),
+            "tab": tab,
+            "action": "bulk_edit_%s" % tab_name,
+            "form": form,
+            "checked_fields": checked_fields,
+            "bulk_edit_fields_name": BULK_EDIT_FIELDS_NAME,
+            "errors": form.is_bound and checked_fields and form.errors,
+            "queryset": queryset,
+            "opts": opts,
+            "app_label": opts.app_label,
+            "media": self.media + form.media,
+            "action_checkbox_name": ACTION_CHECKBOX_NAME,
+        }
+        return TemplateResponse(request, self.bulk_edit_template or [
+            "admin/%s/%s/bulk_edit.html" % (opts.app_label, opts.object_name.lower()),
+            "admin/%s/bulk_edit.html" % opts.app_label,
+            "admin_tabs/bulk_edit.html"
+        ], context, current_app=self.admin_site.name)
+
+    def bulk_edit(self, request, queryset, form, fields):
+        """
+        Set the `fields` values of the valid `form` on the objects of
+        `queryset`, log the change, and returns the number of objects.
+        """
+        opts = self.opts
+        using = router.db_for_write(self.model)
+        objs = list(queryset)
+        m2m_fields = [name for name in fields if isinstance(opts.get_field(name), models.ManyToManyField)]
+        with transaction.commit_on_success(using=using):
+            if m2m_fields or model_has_save_hooks(self.model):
+                for obj in objs:
+                    for name in fields:
+                        if name not in m2m_fields:
+                            opts.get_field(name).save_form_data(obj, form.cleaned_data[name])
+                    if self.version_field:
+                        setattr(obj, self.version_field, getattr(obj, self.version_field) + 1)
+                    obj.save()
+                    for name in m2m_fields:
+                        opts.get_field(name).save_form_data(obj, form.cleaned_data[name])
+            else:
+                values = dict((name, form.cleaned_data[name]) for name in fields)
+                values.update(auto_now_values(self.model))
+                if self.version_field:
+                    values[self.version_field] = models.F(self.version_field) + 1
+                bulk_update(self.model, [obj.pk for obj in objs], values, using=using)
+            change_message = _('Changed %s.') % get_text_list(fields, _('and'))
+            content_type_id = ContentType.objects.get_for_model(self.model).pk
+            bulk_create(LogEntry, [
+                LogEntry(
+                    user_id=request.user.pk,
+                    content_type_id=content_type_id,
+                    object_id=smart_unicode(obj.pk),
+                    object_repr=force_unicode(obj)[:200],
+                    action_flag=CHANGE,
+                    change_message=change_message
+                ) for obj in objs
+            ], using=using)
+        return len(objs)
+
+    def save_model(self, request, obj, form, change):
+        version = getattr(form, "submitted_version", None)
+        if change and self.version_field and version is not None:
+            # Raises VersionConflict if the object was saved since the form
+            # was validated, see change_view
+            claim_version(self.model, obj, self.version_field, version)
+        return super(TabbedModelAdmin, self).save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        """
+        With the TRANSACTION_TAB_SAVEPOINTS strategy, the inline formsets of
+        each tab are saved in their own savepoint: a database error rolls back
+        the changes of this tab only, and is reported on its formsets, which
+        response_change renders again.
+        """
+        using = router.db_for_write(self.model)
+        if (self.transaction_strategy != TRANSACTION_TAB_SAVEPOINTS
+                or not connections[using].features.uses_savepoints):
+            return super(TabbedModelAdmin, self).save_related(request, form, formsets, change)
+        form.save_m2m()
+        for tab, tab_formsets in self._group_formsets_by_tab(request, formsets):
+            sid = transaction.savepoint(using=using)
+            try:
+                for formset in tab_formsets:
+                    self.save_formset(request, form, formset, change=change)
+            except DatabaseError as e:
+                transaction.savepoint_rollback(sid, using=using)
+                message = _('The changes of the "%(tab)s" tab could not be saved: %(error)s') % {
+                    "tab": force_unicode(tab.name) if tab is not None else "",
+                    "error": force_unicode(e),
+                }
+                for formset in tab_formsets:
+                    # Used by ModelAdmin.construct_change_message
+                    formset.new_objects = []
+                    formset.changed_objects = []
+                    formset.deleted_objects = []
+                    formset._non_form_errors = formset.error_class([message])
+                request._admin_tabs_failed_formsets = (
+                    getattr(request, "_admin_tabs_failed_formsets", []) + list(tab_formsets))
+                messages.error(request, message)
+            else:
+                transaction.savepoint_commit(sid, using=using)
+
+    def response_change(self, request, obj):
+        """
+        Render the change form again when the changes of a tab were rolled
+        back (see save_related), with the input of its formsets, instead of
+        redirecting with the success message.
+        """
+        failed_formsets = getattr(request, "_admin_tabs_failed_formsets", None)
+        if failed_formsets:
+            return self._render_failed_formsets(request, obj, failed_formsets)
+        return super(TabbedModelAdmin, self).response_change(request, obj)
+
+    def _render_failed_formsets(self, request, obj, failed_formsets):
+        """
+        Render the change form of the saved `obj`, the rolled back
+        `failed_formsets` being kept bound to the posted data.
+        """
+        opts = self.opts
+        failed_formsets = dict((formset.prefix, formset) for formset in failed_formsets)
+        form = self.get_form(request, obj)(instance=obj)
+        inline_instances = self.get_inline_instances(request)
+        formsets = []
+        prefixes = {}
+        for FormSet, inline in zip(self.get_formsets(request, obj), inline_instances):
+            # The prefixes of ModelAdmin.change_view
+            prefix = FormSet.get_default_prefix()
+            prefixes[prefix] = prefixes.get(prefix, 0) + 1
+            if prefixes[prefix] != 1 or not prefix:
+                prefix = "%s-%s" % (prefix, prefixes[prefix])
+            formset = failed_formsets.get(prefix)
+            if formset is None:
+                formset = FormSet(instance=obj, prefix=prefix, queryset=inline.queryset(request))
+            formsets.append(formset)
+        admin_form = AdminForm(form, self.get_fieldsets(request, obj),
+            self.get_prepopulated_fields(request, obj),
+            self.get_readonly_fields(request, obj),
+            model_admin=self)
+        media = self.media + admin_form.media
+        inline_admin_formsets = []
+        for inline, formset in zip(inline_instances, formsets):
+            inline_admin_formset = InlineAdminFormSet(inline, formset,
+                list(inline.get_fieldsets(request, obj)),
+                dict(inline.get_prepopulated_fields(request, obj)),
+                list(inline.get_readonly_fields(request, obj)),
+                model_admin=self)
+            inline_admin_formsets.append(inline_admin_formset)
+            media = media + inline_admin_formset.media
+        context = {
+            "title": _("Change %s") % force_unicode(opts.verbose_name),
+            "adminform": admin_form,
+            "object_id": obj.pk,
+            "original": obj,
+            "is_popup": IS_POPUP_VAR in request.REQUEST,
+            "media": media,
+            "inline_admin_formsets": inline_admin_formsets,
+            "errors": AdminErrorList(form, formsets),
+            "app_label": opts.app_label,
+            "page_config": request._admin_tabs_page_config,
+        }
+        return self.render_change_form(request, context, change=True, obj=obj)
+
+    def _group_formsets_by_tab(self, request, formsets):
+        """
+        Returns a list of (tab, formsets) tuples, the tab being the first one
+        displaying the formset inline, or None.
+        """
+        inline_tabs = {}
+        page_config = getattr(request, "_admin_tabs_page_config", None)
+        if page_config is not None:
+            for tab in page_config:
+                for col in tab:
+                    for fieldset in col.fieldsets:
+                        inline_tabs.setdefault(fieldset.inline, tab)
+        groups = []
+        for formset in formsets:
+            tab = inline_tabs.get(getattr(formset, "inline_name", None))
+            if not groups or groups[-1][0] is not tab:
+                groups.append((tab, []))
+            groups[-1][1].append(formset)
+        return groups
+
+    def _run_view(self, request, view, *args, **kwargs):
+        """
+        Run `view` according to the transaction strategy.
+        """
+        if self.transaction_strategy == TRANSACTION_PER_REQUEST:
+            return transaction.commit_on_success(view)(*args, **kwargs)
+        # ModelAdmin views run in a transaction, which is only committed on
+        # POST as nothing is written on GET.
+        response = view(*args, **kwargs)
+        if request.method != "POST":
+            # The template response is rendered later: do not hold the read
+            # transaction opened by the view during the rendering
+            using = router.db_for_read(self.model)
+            if not transaction.is_managed(using=using):
+                transaction.rollback_unless_managed(using=using)
+        return response
+
+    def has_view_permission(self, request, obj=None):
+        """
+        The "view_<model>" permission, to add to the Meta.permissions of the
+        model, or the change permission.
+        """
+        opts = self.opts
+        return (request.user.has_perm("%s.view_%s" % (opts.app_label, opts.object_name.lower()))
+            or self.has_change_permission(request, obj))
+
+    def is_display_only(self, request, obj):
+        """
+        True if `obj` is displayed without its form, see display_view.
+        Override it to lock some objects.
+        """
+        return not self.has_change_permission(request, obj) and self.has_view_permission(request, obj)
+
+    def get_display_inline_instances(self, request):
+        """
+        The inlines of the display view: the ones not hidden by the page
+        config, whose model the user can change or view.
+        """
+        page_config = getattr(request, "_admin_tabs_page_config", None)
+        hidden_inlines = page_config.hidden_inlines if page_config is not None else ()
+        inline_instances = []
+        for inline_class in self.inlines:
+            if inline_class.__name__ in hidden_inlines:
+                continue
+            inline = inline_class(self.model, self.admin_site)
+            opts = inline.opts
+            if opts.auto_created:
+                # The many to many through model: check the target model
+                for field in opts.fields:
+                    if field.rel and field.rel.to != self.model:
+                        opts = field.rel.to._meta
+                        break
+            if (inline.has_change_permission(request)
+                    or request.user.has_perm("%s.view_%s" % (opts.app_label, opts.object_name.lower()))):
+                inline_instances.append(inline)
+        return inline_instances
+
+    def display_view(self, request, obj, extra_context=None):
+        """
+        Render the tabs of `obj` without any form nor formset: the values are
+        formatted from the instance, and the inline objects are fetched with
+        one query by inline.
+        """
+        opts = self.opts
+        inline_instances = self.get_display_inline_instances(request)
+        context = {
+            "title": _("View %s") % force_unicode(opts.verbose_name),
+            "original": obj,
+            "object_id": obj.pk,
+            "model_admin": self,
+            "inline_instances": dict((inline.__class__.__name__, inline) for inline in inline_instances),
+            "is_popup": IS_POPUP_VAR in request.REQUEST,
+            "media": self.media,
+            "add": False,
+            "change": True,
+            "has_change_permission": self.has_change_permission(request, obj),
+            "has_absolute_url": hasattr(self.model, "get_absolute_url"),
+            "content_type_id": ContentType.objects.get_for_model(self.model).pk,
+            "opts": opts,
+            "app_label": opts.app_label,
+        }
+        context.update(extra_context or {})
+        return TemplateResponse(request, self.display_form_template or [
+            "admin/%s/%s/display_form.html" % (opts.app_label, opts.object_name.lower()),
+            "admin/%s/display_form.html" % opts.app_label,
+            "admin_tabs/display_form.html"
+        ], context, current_app=self.admin_site.name)
+
+    def render_change_form(self, request, context, add=False, change=False, form_url='', obj=None):
+        if self.defer_tab_media and "page_config" in context:
+            self._defer_tab_media(request, context, obj)
+        return super(TabbedModelAdmin, self).render_change_form(request, context,
+            add=add, change=change, form_url=form_url, obj=obj)
+
+    def _defer_tab_media(self, request, context, obj=None):
+        """
+        Move the media of the fieldsets and of the deferrable_widgets of the
+        tabs other than the first enabled one from context["media"] to
+        context["deferred_tab_media"]. The media of the form (its Media
+        class included), of the other widgets and of the inlines stay in
+        context["media"].
+        """
+        form = context["adminform"].form
+        inline_admin_formsets = context["inline_admin_formsets"]
+        tabs = list(context["page_config"])
+        enabled = [index for index, tab in enumerate(tabs) if tab.enabled]
+        first_tab = tabs[enabled[0]] if enabled else None
+        first_tab_fields = set(first_tab.get_fields(request, obj)) if first_tab else set()
+        deferred_fields = set()
+        tab_medias = []
+        for tab in tabs:
+            if tab is first_tab:
+                tab_medias.append(forms.Media())
+                continue
+            tab_medias.append(tab.get_media(request, form, inline_admin_formsets, obj, self.deferrable_widgets))
+            deferred_fields.update(
+                name for name in tab.get_fields(request, obj)
+                if name in form.fields and name not in first_tab_fields
+                and isinstance(form.fields[name].widget, self.deferrable_widgets)
+            )
+        # The media the page needs when it is rendered
+        fields = form.fields
+        form.fields = SortedDict(
+            (name, field) for name, field in fields.items() if name not in deferred_fields
+        )
+        try:
+            needed = self.media + form.media
+        finally:
+            form.fields = fields
+        for inline_admin_formset in inline_admin_formsets:
+            needed = needed + inline_admin_formset.media
+        if first_tab:
+            needed = needed + first_tab.get_media(request, form, inline_admin_formsets, obj)
+        deferred = sum(tab_medias, forms.Media())
+        deferred_css = set(path for paths in deferred._css.values() for path in paths)
+        needed_css = set(path for paths in needed._css.values() for path in paths)
+        media = forms.Media()
+        media._js = [
+            path for path in context["media"]._js
+            if path in needed._js or path not in deferred._js
+        ]
+        media._css = dict(
+            (medium, [path for path in paths if path in needed_css or path not in deferred_css])
+            for medium, paths in context["media"]._css.items()
+        )
+        context["media"] = media
+        context["deferred_tab_media"] = simplejson.dumps([media_urls(tab_media, media) for tab_media in tab_medias])
+
+    def _run_measured(self, request, view_name, run_view):
+        """
+        Call `run_view` and report the metrics of the view once its response
+        is rendered, if a metrics backend is set (see admin_tabs.metrics).
+        """
+        if metrics.get_backend() is None:
+            return run_view()
+        opts = self.opts
+        batch = metrics.start_batch("%s.%s" % (opts.app_label, opts.object_name.lower()))
+        count_queries = getattr(settings, "ADMIN_TABS_METRICS_QUERIES", False)
+        use_debug_cursor = connection.use_debug_cursor
+        if count_queries:
+            connection.use_debug_cursor = True
+        # The template tags report the timings of the cols to the profile,
+        # which may have been started by profile_change_view
+        profile = get_profile()
+        own_profile = profile is None
+        if own_profile:
+            profile = start_profile()
+        measure = Measure()
+        def report(response):
+            if own_profile:
+                stop_profile()
+            timings = [(view_name, measure.stop("page", view_name, getattr(response, "content", "")))]
+            page_config = getattr(request, "_admin_tabs_page_config", None)
+            if page_config is not None and profile.cols:
+                timings += [
+                    ("tab.%s" % metrics.metric_name(tab.name), timing)
+                    for tab, timing, cols in profile.tabs(page_config)
+                ]
+            for name, timing in timings:
+                batch.timing("%s.time" % name, timing.seconds)
+                batch.value("%s.size" % name, timing.size)
+                if count_queries:
+                    batch.value("%s.queries" % name, timing.queries)
+            metrics.stop_batch()
+        try:
+            response = run_view()
+            if count_queries and not getattr(response, "is_rendered", True):
+                # Render it while the queries are counted
+                response.render()
+        except Exception:
+            if own_profile:
+                stop_profile()
+            metrics.stop_batch(send=False)
+            raise
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        if getattr(response, "is_rendered", True):
+            report(response)
+        else:
+            response.add_post_render_callback(report)
+        return response
+
     @csrf_protect_m
-    @transaction.commit_on_success
     def change_view(self, request, object_id, form_url='', extra_context=None):
+        return self._run_measured(request, "change_view",
+            partial(self._change_view, request, object_id, form_url, extra_context))
+
+    def _change_view(self, request, object_id, form_url='', extra_context=None):
         if extra_context is None:
             extra_context = {}
-        page_config = self.get_page_config(request, obj_or_id=object_id)
+        obj_or_id = object_id
+        display_only = False
+        # Shared with the change_view of Django, see get_object
+        obj = self.get_object(request, unquote(object_id))
+        if obj is not None:
+            obj_or_id = obj
+            display_only = request.method != "POST" and self.is_display_only(request, obj)
+        request._admin_tabs_object = obj
+        page_config = self.get_page_config(request, obj_or_id=obj_or_id)
+        request._admin_tabs_page_config = page_config
         extra_context.update({'page_config': page_config})
+        if display_only:
+            return self._run_view(request, self.display_view, request, obj_or_id, extra_context)
+        view = super(TabbedModelAdmin, self).change_view
+        def run_view():
+            try:
+                # django 1.4
+                return self._run_view(request, view, request, object_id, form_url=form_url, extra_context=extra_context)
+            except TypeError:
+                # django 1.3
+                return self._run_view(request, view, request, object_id, extra_context=extra_context)
         try:
-            # django 1.4
-            return super(TabbedModelAdmin, self).change_view(request, object_id, form_url=form_url, extra_context=extra_context)
-        except TypeError:
-            # django 1.3
-            return super(TabbedModelAdmin, self).change_view(request, object_id, extra_context=extra_context)
+            return run_view()
+        except VersionConflict:
+            # Saved by someone else between the validation and the save: the
+            # transaction was rolled back, run the view again to validate the
+            # form against the new version and report the conflict
+            self.forget_object(request, unquote(object_id))
+            request._admin_tabs_object = self.get_object(request, unquote(object_id))
+            return run_view()
     
     @csrf_protect_m
-    @transaction.commit_on_success
     def add_view(self, request, form_url='', extra_context=None):
+        return self._run_measured(request, "add_view",
+            partial(self._add_view, request, form_url, extra_context))
+
+    def _add_view(self, request, form_url='', extra_context=None):
         if extra_context is None:
             extra_context = {}
         page_config = self.get_page_config(request)
+        request._admin_tabs_page_config = page_config
         extra_context.update({'page_config': page_config})
-        return super(TabbedModelAdmin, self).add_view(request, form_url=form_url, extra_context=extra_context)
+        view = super(TabbedModelAdmin, self).add_view
+        return self._run_view(request, view, request, form_url=form_url, extra_context=extra_context)
 
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import cProfile
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.exceptions import PermissionDenied
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import get_resolver, reverse
+from django.db.models import get_model
+from django.http import Http404
+from django.test.client import RequestFactory
+from django.utils.importlib import import_module
+
+from admin_tabs.helpers import TabbedModelAdmin
+from admin_tabs.profiling import profile_change_view
+
+
+class Command(BaseCommand):
+    args = "<app_label.Model> <pk>"
+    help = "Render the tabbed change form of an object and report the time, queries and size of each tab, col, fieldset and inline."
+    option_list = BaseCommand.option_list + (
+        make_option("--user", dest="username", default=None,
+            help="Username of the user rendering the page (default to the first superuser)."),
+        make_option("--site", dest="site", default="django.contrib.admin.site",
+            help="Dotted path of the admin site (default to django.contrib.admin.site)."),
+        make_option("--limit", dest="limit", type="int", default=10,
+            help="Number of fieldsets and inlines listed as the slowest (default to 10)."),
+        make_option("--profile-output", dest="profile_output", default=None,
+            help="Write a cProfile dump of the rendering to this file."),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2 or args[0].count(".") != 1:
+            raise CommandError("Usage: %s %s" % (self.__class__.__module__.split(".")[-1], self.args))
+        # Importing the urlconf runs admin.autodiscover() in most projects
+        get_resolver(None)._populate()
+        model = get_model(*args[0].split("."))
+        if model is None:
+            raise CommandError("Unknown model %r" % args[0])
+        module_name, attr = options["site"].rsplit(".", 1)
+        site = getattr(import_module(module_name), attr)
+        model_admin = site._registry.get(model)
+        if not isinstance(model_admin, TabbedModelAdmin):
+            raise CommandError("%s is not registered with a TabbedModelAdmin" % args[0])
+        if options["username"]:
+            try:
+                user = User.objects.get(username=options["username"])
+            except User.DoesNotExist:
+                raise CommandError("Unknown user %r" % options["username"])
+        else:
+            try:
+                user = User.objects.filter(is_superuser=True, is_active=True).order_by("pk")[0]
+            except IndexError:
+                raise CommandError("No active superuser, use --user")
+
+        object_id = args[1]
+        url = reverse("admin:%s_%s_change" % (model._meta.app_label, model._meta.module_name),
+            args=(object_id,), current_app=site.name)
+        request = RequestFactory().get(url)
+        request.user = user
+        profiler = None
+        if options["profile_output"]:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        try:
+            response, page_timing, profile = profile_change_view(model_admin, request, object_id)
+        except (Http404, PermissionDenied) as e:
+            raise CommandError("GET %s failed: %r" % (url, e))
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profiler.dump_stats(options["profile_output"])
+
+        if response.status_code != 200:
+            raise CommandError("GET %s returned a %s response" % (url, response.status_code))
+        self.write_timing(page_timing, "GET %s" % url)
+        self.stdout.write("\nTabs:\n")
+        for tab, tab_timing, cols in profile.tabs(response.context_data["page_config"]):
+            self.write_timing(tab_timing, tab.name, indent=2)
+            for col, col_timing in cols:
+                self.write_timing(col_timing, col.name, indent=4)
+        self.stdout.write("\nSlowest fieldsets and inlines:\n")
+        for timing in profile.slowest_elements(options["limit"]):
+            self.write_timing(timing, "%s %s" % (timing.kind, timing.name), indent=2)
+        if profiler is not None:
+            self.stdout.write("\ncProfile dump written to %s\n" % options["profile_output"])
+
+    def write_timing(self, timing, label, indent=0):
+        self.stdout.write("%-50s %9.1f ms %5d queries %9d bytes\n" % (
+            (" " * indent + unicode(label))[:50],
+            timing.seconds * 1000,
+            timing.queries,
+            timing.size
+        ))
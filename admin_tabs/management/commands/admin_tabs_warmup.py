@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from optparse import make_option
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_tabs.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = "Build the layouts, form classes and templates of the tabbed model admins."
+    option_list = BaseCommand.option_list + (
+        make_option("--user", dest="username", default=None,
+            help="Username used to build the layouts (default to the first superuser)."),
+    )
+
+    def handle(self, *args, **options):
+        user = None
+        if options["username"]:
+            try:
+                user = User.objects.get(username=options["username"])
+            except User.DoesNotExist:
+                raise CommandError("Unknown user %r" % options["username"])
+        warmed = warmup(user=user)
+        if int(options.get("verbosity", 1)) > 0:
+            for model_admin, seconds in warmed:
+                self.stdout.write("%s.%s: %.1f ms\n" % (
+                    model_admin.opts.app_label,
+                    model_admin.opts.object_name,
+                    seconds * 1000
+                ))
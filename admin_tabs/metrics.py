@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Production metrics of the tabbed change forms: render time, rendered size
+and query count of the page and of each tab, and hits of the layout caches.
+
+Set the ADMIN_TABS_METRICS_BACKEND setting to the dotted path of a backend
+class, instantiated with the ADMIN_TABS_METRICS_OPTIONS dict:
+
+    ADMIN_TABS_METRICS_BACKEND = "admin_tabs.metrics.StatsdBackend"
+    ADMIN_TABS_METRICS_OPTIONS = {"host": "localhost", "port": 8125}
+
+The metrics of a request are collected in memory, and sent at once when the
+page is rendered. They are named "<app_label>.<model>.<metric>", eg.
+"example_app.article.tab.main.time". The queries are only counted with
+ADMIN_TABS_METRICS_QUERIES = True, which turns the debug cursor on during
+the view and renders its response in the view.
+"""
+import socket
+import threading
+
+from django.conf import settings
+from django.template.defaultfilters import slugify
+from django.utils.importlib import import_module
+
+_local = threading.local()
+
+# The backend instance, built on first use (see get_backend)
+_backend = None
+_backend_loaded = False
+
+
+class MetricsBackend(object):
+    """
+    Base class of the metrics backends.
+    """
+    def send(self, metrics):
+        """
+        Send a list of (name, value, type) metrics, type being "ms" for the
+        timings and distributions, "c" for the counters.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(MetricsBackend):
+    """
+    Keep the metrics in the `metrics` list, for the tests.
+    """
+    def __init__(self):
+        self.metrics = []
+
+    def send(self, metrics):
+        self.metrics.extend(metrics)
+
+    def values(self, name):
+        return [value for metric_name, value, type in self.metrics if metric_name == name]
+
+
+class StatsdBackend(MetricsBackend):
+    """
+    Send the metrics to a statsd server, several metrics by UDP packet.
+    """
+    def __init__(self, host="localhost", port=8125, prefix="admin_tabs", packet_size=512):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.packet_size = packet_size
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, name, value, type):
+        if type == "ms":
+            value = "%.3f" % value
+        return "%s.%s:%s|%s" % (self.prefix, name, value, type)
+
+    def send(self, metrics):
+        packet = ""
+        for metric in metrics:
+            line = self.format(*metric)
+            if packet and len(packet) + len(line) + 1 > self.packet_size:
+                self._send(packet)
+                packet = ""
+            packet = "%s\n%s" % (packet, line) if packet else line
+        if packet:
+            self._send(packet)
+
+    def _send(self, packet):
+        try:
+            self.socket.sendto(packet, self.address)
+        except socket.error:
+            pass  # Never break a page for its metrics
+
+
+def get_backend():
+    """
+    Returns the backend set by ADMIN_TABS_METRICS_BACKEND, or None.
+    """
+    global _backend, _backend_loaded
+    if not _backend_loaded:
+        path = getattr(settings, "ADMIN_TABS_METRICS_BACKEND", None)
+        if path is not None:
+            module_name, class_name = path.rsplit(".", 1)
+            backend_class = getattr(import_module(module_name), class_name)
+            _backend = backend_class(**getattr(settings, "ADMIN_TABS_METRICS_OPTIONS", {}))
+        _backend_loaded = True
+    return _backend
+
+
+def set_backend(backend):
+    """
+    Replace the backend, eg. by an InMemoryBackend in the tests, and returns
+    the previous one.
+    """
+    global _backend, _backend_loaded
+    previous = get_backend()
+    _backend = backend
+    _backend_loaded = True
+    return previous
+
+
+def metric_name(name):
+    """
+    Returns `name` (eg. a tab name) usable in a metric name.
+    """
+    return slugify(name).replace("-", "_") or "_"
+
+
+class MetricsBatch(object):
+    """
+    The metrics collected while serving a request.
+    """
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.metrics = []
+        self.counters = {}  # Summed up, sent once
+
+    def timing(self, name, seconds):
+        self.metrics.append(("%s.%s" % (self.prefix, name), seconds * 1000, "ms"))
+
+    def value(self, name, value):
+        self.metrics.append(("%s.%s" % (self.prefix, name), value, "ms"))
+
+    def incr(self, name, count=1):
+        self.counters[name] = self.counters.get(name, 0) + count
+
+    def get_metrics(self):
+        return self.metrics + [
+            ("%s.%s" % (self.prefix, name), count, "c")
+            for name, count in sorted(self.counters.items())
+        ]
+
+
+def start_batch(prefix):
+    """
+    Start collecting the metrics of the current thread.
+    """
+    _local.batch = MetricsBatch(prefix)
+    return _local.batch
+
+
+def get_batch():
+    """
+    Returns the batch of the current thread, or None.
+    """
+    return getattr(_local, "batch", None)
+
+
+def stop_batch(send=True):
+    """
+    Stop collecting the metrics of the current thread, and send them.
+    """
+    batch = get_batch()
+    _local.batch = None
+    backend = get_backend()
+    if send and batch is not None and backend is not None:
+        batch_metrics = batch.get_metrics()
+        if batch_metrics:
+            backend.send(batch_metrics)
+    return batch
+
+
+def incr(name, count=1):
+    """
+    Increment the `name` counter of the current batch, if any.
+    """
+    batch = get_batch()
+    if batch is not None:
+        batch.incr(name, count)
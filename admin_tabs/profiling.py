@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Measure the rendering of the cols, fieldsets and inlines of a tabbed change
+form.
+
+The render_fieldsets_for_admincol template tag reports to the profile started
+in the current thread, if any:
+
+    profile = start_profile()
+    try:
+        response = model_admin.change_view(request, object_id)
+        response.render()
+    finally:
+        stop_profile()
+    for tab, timing, cols in profile.tabs(response.context_data["page_config"]):
+        ...
+
+Query counts are only available when the debug cursor is used (DEBUG = True,
+or connection.use_debug_cursor = True).
+"""
+import threading
+import time
+
+from django.db import connection
+
+_local = threading.local()
+
+
+class Timing(object):
+    """
+    Wall time, query count and rendered size of a part of the page.
+    """
+    def __init__(self, kind, name, seconds=0, queries=0, size=0):
+        self.kind = kind  # "page", "tab", "col", "fieldset" or "inline"
+        self.name = name
+        self.seconds = seconds
+        self.queries = queries
+        self.size = size
+
+    def __add__(self, other):
+        return Timing(self.kind, self.name,
+            self.seconds + other.seconds,
+            self.queries + other.queries,
+            self.size + other.size
+        )
+
+    def __repr__(self):
+        return "<Timing %s %r: %.1f ms, %d queries, %d bytes>" % (
+            self.kind, self.name, self.seconds * 1000, self.queries, self.size)
+
+
+class Measure(object):
+    """
+    Start a measure when instantiated, call `stop` to get the Timing.
+    """
+    def __init__(self):
+        self.start = time.time()
+        self.queries = len(connection.queries)
+
+    def stop(self, kind, name, html=""):
+        return Timing(kind, name,
+            seconds=time.time() - self.start,
+            queries=len(connection.queries) - self.queries,
+            size=len(html)
+        )
+
+
+class RenderProfile(object):
+    """
+    Timings collected while rendering a tabbed change form.
+    """
+    def __init__(self):
+        self.cols = []  # (admin_col, timing), in rendering order
+        self.elements = []  # (admin_col, timing) of the fieldsets and inlines
+
+    def add_col(self, admin_col, timing):
+        self.cols.append((admin_col, timing))
+
+    def add_element(self, admin_col, timing):
+        self.elements.append((admin_col, timing))
+
+    def tabs(self, page_config):
+        """
+        Returns a list of (tab, timing, [(col, timing), ...]) for the tabs of
+        `page_config`.
+        """
+        # A col may be rendered in several tabs: consume the timings in
+        # rendering order
+        col_timings = {}
+        for admin_col, timing in self.cols:
+            col_timings.setdefault(id(admin_col), []).append(timing)
+        tabs = []
+        for tab in page_config:
+            tab_timing = Timing("tab", tab.name)
+            cols = []
+            for col in tab:
+                if not col_timings.get(id(col)): continue
+                timing = col_timings[id(col)].pop(0)
+                tab_timing += timing
+                cols.append((col, timing))
+            tabs.append((tab, tab_timing, cols))
+        return tabs
+
+    def slowest_elements(self, limit=None):
+        """
+        Returns the fieldsets and inlines timings, slowest first.
+        """
+        timings = [timing for admin_col, timing in self.elements]
+        timings.sort(key=lambda timing: timing.seconds, reverse=True)
+        return timings[:limit]
+
+
+def start_profile():
+    """
+    Start collecting timings in the current thread, and return the profile.
+    """
+    _local.profile = RenderProfile()
+    return _local.profile
+
+
+def stop_profile():
+    """
+    Stop collecting timings in the current thread, and return the profile.
+    """
+    profile = get_profile()
+    _local.profile = None
+    return profile
+
+
+def get_profile():
+    """
+    Returns the profile of the current thread, or None.
+    """
+    return getattr(_local, "profile", None)
+
+
+def profile_change_view(model_admin, request, object_id=None):
+    """
+    Render the change view of `object_id` (or the add view if None) and
+    returns a tuple (response, page timing, profile).
+
+    The debug cursor is used while rendering, to count the queries.
+    """
+    use_debug_cursor = connection.use_debug_cursor
+    connection.use_debug_cursor = True
+    profile = start_profile()
+    try:
+        measure = Measure()
+        if object_id is None:
+            response = model_admin.add_view(request)
+        else:
+            response = model_admin.change_view(request, object_id)
+        if hasattr(response, "render"):
+            response.render()
+        page_timing = measure.stop("page", unicode(model_admin), response.content)
+    finally:
+        stop_profile()
+        connection.use_debug_cursor = use_debug_cursor
+    return response, page_timing, profile
@@ -4,8 +4,14 @@ from django.contrib.admin.helpers import Fieldset, InlineAdminFormSet
 from django.template.loader import render_to_string
 from django.core.exceptions import ImproperlyConfigured
 
+from admin_tabs.display import display_fields, display_inline
+from admin_tabs.helpers import INLINE_DIRTY_MARKER
+from admin_tabs.profiling import get_profile, Measure
+
 register = template.Library()
 
+INLINE_DIRTY_MARKER_INPUT = u'<input type="hidden" name="%s-%s" value="0" class="admin-tabs-dirty" />'
+
 @register.simple_tag(takes_context=True)
 def render_fieldsets_for_admincol(context, admin_col):
     """
@@ -17,14 +23,21 @@ def render_fieldsets_for_admincol(context, admin_col):
         raise ImproperlyConfigured(
                '"request" missing from context. Add django.core.context_processors.request to your TEMPLATE_CONTEXT_PROCESSORS')
     request = context['request']
-    obj = context.get('original', None)
+    obj = admin_form.model_admin.get_view_object(request)
+    if obj is None:
+        obj = context.get('original', None)
     fieldsets = admin_col.get_elements(request, obj, include_inlines=True)
     readonly_fields = admin_form.model_admin.get_readonly_fields(request, obj)
     template = "admin/includes/fieldset.html"
     # Make a dict matching to retrieve inline_admin_formsets
     # {"inline class name": inline_formset_instance}
     inline_matching = dict((inline.opts.__class__.__name__, inline) for inline in context["inline_admin_formsets"])
+    profile = get_profile()
+    if profile is not None:
+        col_measure = Measure()
     for name, options in fieldsets:
+        if profile is not None:
+            measure = Measure()
         if "fields" in options:
             f = Fieldset(admin_form.form, name,
                 readonly_fields=readonly_fields,
@@ -32,13 +45,53 @@ def render_fieldsets_for_admincol(context, admin_col):
                 **options
             )
             context["fieldset"] = f
-            out += render_to_string(template, context)
+            html = render_to_string(template, context)
+            kind = "fieldset"
         elif "inline" in options:
             try:
                 inline_admin_formset = inline_matching[options["inline"]]
                 context["inline_admin_formset"] = inline_admin_formset
-                out += render_to_string(inline_admin_formset.opts.template, context)
+                html = render_to_string(inline_admin_formset.opts.template, context)
+                html += INLINE_DIRTY_MARKER_INPUT % (inline_admin_formset.formset.prefix, INLINE_DIRTY_MARKER)
+                kind = "inline"
             except KeyError:  # The user does not have the permission
-                pass
+                continue
+        out += html
+        if profile is not None:
+            profile.add_element(admin_col, measure.stop(kind, name, html))
+    if profile is not None:
+        profile.add_col(admin_col, col_measure.stop("col", admin_col.name, out))
     return out
 
+
+@register.simple_tag(takes_context=True)
+def render_display_for_admincol(context, admin_col):
+    """
+    Render the fieldsets and inlines of a col without form, for the display
+    only view.
+    """
+    out = u""
+    if not 'request' in context:
+        raise ImproperlyConfigured(
+               '"request" missing from context. Add django.core.context_processors.request to your TEMPLATE_CONTEXT_PROCESSORS')
+    request = context['request']
+    obj = context['original']
+    model_admin = context['model_admin']
+    for name, options in admin_col.get_elements(request, obj, include_inlines=True):
+        if "fields" in options:
+            out += render_to_string("admin_tabs/display_fieldset.html", {
+                "name": name,
+                "classes": u" ".join(options["classes"] or ()),
+                "rows": display_fields(obj, options["fields"], model_admin),
+            })
+        else:
+            inline = context["inline_instances"].get(options["inline"])
+            if inline is None:  # Hidden by the page config
+                continue
+            labels, rows = display_inline(request, inline, obj)
+            out += render_to_string("admin_tabs/display_inline.html", {
+                "name": name or inline.opts.verbose_name_plural,
+                "labels": labels,
+                "rows": rows,
+            })
+    return out
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+Query budget assertions for the tests of your tabbed model admins:
+
+    class ArticleAdminTests(TabbedAdminTestMixin, TestCase):
+
+        def test_query_budget(self):
+            model_admin = admin.site._registry[Article]
+            self.assertQueryBudget(model_admin, article.pk, page=12, tabs={"Main": 2})
+
+        def test_no_n_plus_one(self):
+            def add_rows():
+                article.authors.add(User.objects.create(username="another"))
+            self.assertQueriesDoNotGrow(model_admin, article.pk, add_rows)
+
+The queries are counted with admin_tabs.profiling, tab by tab, on the
+first rendering after the caches are reset: pass warm=True to count the
+next renderings instead.
+"""
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test.client import RequestFactory
+
+from admin_tabs.choices import clear_cached_choices
+from admin_tabs.profiling import profile_change_view
+
+
+class TabbedAdminTestMixin(object):
+    """
+    TestCase mixin rendering the change and add forms of TabbedModelAdmins
+    and checking their query counts.
+    """
+
+    def setUp(self):
+        super(TabbedAdminTestMixin, self).setUp()
+        # The rows rolled back by the previous tests do not invalidate them
+        clear_cached_choices()
+
+    def reset_tabbed_caches(self, model_admin):
+        """
+        Empty the caches filled by the first rendering of a form: the cached
+        choices, the content types, and the page configs, form classes and
+        empty forms of `model_admin`.
+        """
+        clear_cached_choices()
+        ContentType.objects.clear_cache()
+        model_admin._page_configs.clear()
+        model_admin._form_classes.clear()
+        model_admin._empty_forms.clear()
+
+    def get_budget_user(self):
+        """
+        The user rendering the forms, a superuser by default.
+        """
+        user, created = User.objects.get_or_create(username="admin_tabs_budget", defaults={
+            "is_staff": True,
+            "is_superuser": True,
+        })
+        return user
+
+    def render_tabbed_form(self, model_admin, object_id=None, user=None):
+        """
+        Render the change form of `object_id`, or the add form if None, and
+        returns a tuple (response, page timing, profile).
+        """
+        request = RequestFactory().get("/")
+        request.user = user or self.get_budget_user()
+        response, page_timing, profile = profile_change_view(model_admin, request,
+            None if object_id is None else str(object_id))
+        self.assertEqual(response.status_code, 200)
+        return response, page_timing, profile
+
+    def count_queries(self, model_admin, object_id=None, user=None, warm=False):
+        """
+        Returns a dict {tab name: query count}, the query count of the whole
+        page being under the None key.
+
+        The caches are reset (see reset_tabbed_caches) and the queries of the
+        first rendering are counted, as for the first request of a process.
+        With `warm`, the form is rendered again and the queries of the second
+        rendering are counted, as for the next requests.
+        """
+        self.reset_tabbed_caches(model_admin)
+        response, page_timing, profile = self.render_tabbed_form(model_admin, object_id, user)
+        if warm:
+            response, page_timing, profile = self.render_tabbed_form(model_admin, object_id, user)
+        counts = {None: page_timing.queries}
+        for tab, timing, cols in profile.tabs(response.context_data["page_config"]):
+            counts[tab.name] = timing.queries
+        return counts
+
+    def assertQueryBudget(self, model_admin, object_id=None, page=None, tabs=None, user=None, warm=False):
+        """
+        Fails if the form runs more than `page` queries, or if a tab runs
+        more queries than its budget in the `tabs` dict {tab name: budget}.
+        See count_queries for `warm`.
+        """
+        counts = self.count_queries(model_admin, object_id, user, warm)
+        budgets = dict(tabs or {})
+        if page is not None:
+            budgets[None] = page
+        over = [
+            "%s: %d queries, budget %d" % (name or "page", counts.get(name, 0), budget)
+            for name, budget in sorted(budgets.items())
+            if counts.get(name, 0) > budget
+        ]
+        if over:
+            self.fail("Query budget exceeded for %s (%s)" % (model_admin, ", ".join(over)))
+
+    def assertQueriesDoNotGrow(self, model_admin, object_id, add_rows, user=None, warm=False):
+        """
+        Fails if a tab, or the page, runs more queries after `add_rows()`
+        adds inline rows or related objects. See count_queries for `warm`.
+        """
+        before = self.count_queries(model_admin, object_id, user, warm)
+        add_rows()
+        after = self.count_queries(model_admin, object_id, user, warm)
+        grown = [
+            "%s: %d queries, %d before" % (name or "page", count, before.get(name, 0))
+            for name, count in sorted(after.items())
+            if count > before.get(name, 0)
+        ]
+        if grown:
+            self.fail("Query count grows with the rows for %s (%s)" % (model_admin, ", ".join(grown)))
@@ -1 +1,16 @@
 from admin_tabs.tests.metaadminpageconfig import *
+from admin_tabs.tests.conditions import *
+from admin_tabs.tests.warmup import *
+from admin_tabs.tests.profiling import *
+from admin_tabs.tests.inlines import *
+from admin_tabs.tests.bulk import *
+from admin_tabs.tests.concurrency import *
+from admin_tabs.tests.media import *
+from admin_tabs.tests.display import *
+from admin_tabs.tests.choices import *
+from admin_tabs.tests.metrics import *
+from admin_tabs.tests.columns import *
+from admin_tabs.tests.objects import *
+from admin_tabs.tests.emptyforms import *
+from admin_tabs.tests.transactions import *
+from admin_tabs.tests.testing import *
@@ -0,0 +1,381 @@
+from django.contrib.admin.models import LogEntry
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, IntegrityError
+from django.db import models
+from django.db.models import signals
+from django.forms.models import inlineformset_factory, BaseInlineFormSet
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.bulk import model_has_save_hooks, BulkSaveFormSetMixin
+from admin_tabs.conditions import add_only, change_only, obj_attr
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config, BULK_EDIT_FIELDS_NAME
+
+__all__ = [
+    "ModelHasSaveHooksTests",
+    "BulkEditActionTests",
+    "BulkEditIntegrityTests",
+    "ConditionalBulkEditTests",
+    "BulkSaveFormSetTests",
+]
+
+
+class SavingPermission(Permission):
+
+    class Meta:
+        proxy = True
+        app_label = "admin_tabs"
+
+    def save(self, *args, **kwargs):
+        return super(SavingPermission, self).save(*args, **kwargs)
+
+
+class Attachment(models.Model):
+    user = models.ForeignKey(User)
+    name = models.CharField(max_length=50)
+    document = models.FileField(upload_to="attachments")
+
+    class Meta:
+        app_label = "admin_tabs"
+
+
+class ModelHasSaveHooksTests(TestCase):
+
+    def test_plain_model(self):
+        self.assertFalse(model_has_save_hooks(Permission))
+
+    def test_overridden_save(self):
+        self.assertTrue(model_has_save_hooks(SavingPermission))
+
+    def test_signal_receivers(self):
+        def receiver(sender, **kwargs): pass
+        signals.post_save.connect(receiver, sender=Permission)
+        try:
+            self.assertTrue(model_has_save_hooks(Permission))
+        finally:
+            signals.post_save.disconnect(receiver, sender=Permission)
+
+
+class UserPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+        status = Config(fields=["is_staff", "is_active", "last_login"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        status_col = Config(fieldsets=["status"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        status_tab = Config(name="Status", cols=["status_col"], bulk_edit=True)
+
+
+class UserAdmin(TabbedModelAdmin):
+    page_config_class = UserPageConfig
+    readonly_fields = ("last_login",)
+
+
+class BulkEditActionTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_superuser=True)
+        self.model_admin = UserAdmin(User, AdminSite())
+        self.model_admin.message_user = lambda request, message: None
+        for username in ("a", "b", "c"):
+            User.objects.create(username=username)
+
+    def get_request(self, data=None):
+        if data is None:
+            request = RequestFactory().get("/")
+        else:
+            request = RequestFactory().post("/", data)
+        request.user = self.admin
+        return request
+
+    def test_should_add_an_action_by_bulk_edit_tab(self):
+        actions = self.model_admin.get_actions(self.get_request())
+        self.assertTrue("bulk_edit_status_tab" in actions)
+        self.assertFalse("bulk_edit_main_tab" in actions)
+
+    def test_bulk_edit_fields(self):
+        tab = self.model_admin.get_page_config(self.get_request()).Tabs.status_tab
+        self.assertEqual(self.model_admin.get_bulk_edit_fields(self.get_request(), tab),
+            ["is_staff", "is_active"])
+
+    def test_should_show_the_tab_form(self):
+        queryset = User.objects.exclude(pk=self.admin.pk)
+        response = self.model_admin.bulk_edit_view(self.get_request(), queryset, "status_tab")
+        self.assertEqual(response.context_data["form"].fields.keys(), ["is_staff", "is_active"])
+
+    def test_should_set_the_checked_fields(self):
+        queryset = User.objects.exclude(pk=self.admin.pk)
+        request = self.get_request({
+            "post": "yes",
+            BULK_EDIT_FIELDS_NAME: ["is_staff"],
+            "is_staff": "on",
+            "is_active": "",  # Not checked, not set
+        })
+        response = self.model_admin.bulk_edit_view(request, queryset, "status_tab")
+        self.assertEqual(response, None)
+        self.assertEqual(
+            list(queryset.order_by("username").values_list("username", "is_staff", "is_active")),
+            [(u"a", True, True), (u"b", True, True), (u"c", True, True)]
+        )
+        self.assertEqual(LogEntry.objects.filter(user=self.admin).count(), 3)
+
+
+class PermissionPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["name", "content_type", "codename"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"], bulk_edit=True)
+
+
+class PermissionAdmin(TabbedModelAdmin):
+    page_config_class = PermissionPageConfig
+
+
+class BulkEditIntegrityTests(TestCase):
+
+    def setUp(self):
+        self.model_admin = PermissionAdmin(Permission, AdminSite())
+        self.messages = []
+        self.model_admin.message_user = lambda request, message: self.messages.append(message)
+        self.request = RequestFactory().post("/", {
+            "post": "yes",
+            BULK_EDIT_FIELDS_NAME: ["name"],
+            "name": "Same name",
+        })
+        self.request.user = User.objects.create(username="admin", is_superuser=True)
+
+    def test_should_leave_out_the_unique_together_fields(self):
+        tab = self.model_admin.get_page_config(self.request).Tabs.main_tab
+        self.assertEqual(self.model_admin.get_bulk_edit_fields(self.request, tab), ["name"])
+
+    def test_should_report_integrity_errors(self):
+        def bulk_edit(request, queryset, form, fields):
+            raise IntegrityError("columns content_type_id, codename are not unique")
+        self.model_admin.bulk_edit = bulk_edit
+        response = self.model_admin.bulk_edit_view(self.request, Permission.objects.all(), "main_tab")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.messages, [
+            "The permissions could not be changed: columns content_type_id, codename are not unique"
+        ])
+
+
+class ConditionalPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        status = Config(fields=["is_staff"])
+        staff = Config(fields=["is_active"], visible=obj_attr("is_staff"))
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        status_col = Config(fieldsets=["status", "staff"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"], bulk_edit=True, visible=add_only)
+        status_tab = Config(name="Status", cols=["status_col"], bulk_edit=True, visible=change_only)
+
+
+class ConditionalUserAdmin(TabbedModelAdmin):
+    page_config_class = ConditionalPageConfig
+
+
+class ConditionalBulkEditTests(TestCase):
+    """
+    The bulk edit actions apply to existing objects, and keep the fieldsets
+    depending on the object.
+    """
+
+    def setUp(self):
+        self.model_admin = ConditionalUserAdmin(User, AdminSite())
+        self.request = RequestFactory().get("/")
+        self.request.user = User.objects.create(username="admin", is_superuser=True)
+
+    def test_should_add_the_actions_of_the_conditional_tabs(self):
+        actions = self.model_admin.get_actions(self.request)
+        self.assertTrue("bulk_edit_status_tab" in actions)
+        self.assertFalse("bulk_edit_main_tab" in actions)
+
+    def test_should_keep_the_conditional_fieldsets(self):
+        response = self.model_admin.bulk_edit_view(self.request, User.objects.all(), "status_tab")
+        self.assertEqual(response.context_data["form"].fields.keys(), ["is_staff", "is_active"])
+
+    def test_should_call_the_other_predicates(self):
+        class StaffPageConfig(ConditionalPageConfig):
+
+            class TabsConfig:
+                status_tab = Config(visible=lambda request, obj: request.user.is_staff)
+
+        self.model_admin.page_config_class = StaffPageConfig
+        self.assertFalse("bulk_edit_status_tab" in self.model_admin.get_actions(self.request))
+        self.request.user.is_staff = True
+        self.assertTrue("bulk_edit_status_tab" in self.model_admin.get_actions(self.request))
+
+
+class PermissionsInline(TabularInline):
+    model = Permission
+    fields = ("name", "codename")
+
+
+class BulkCreateFormSet(BaseInlineFormSet):
+    bulk_create_new_objects = True
+
+
+class ContentTypePageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["name"])
+        permissions = Config(inline="PermissionsInline")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "permissions"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class ContentTypeAdmin(TabbedModelAdmin):
+    page_config_class = ContentTypePageConfig
+    inlines = (PermissionsInline,)
+    bulk_save_inlines = True
+
+
+class BulkSaveFormSetTests(TestCase):
+
+    def setUp(self):
+        self.content_type = ContentType.objects.create(app_label="tests", model="thing", name="thing")
+        self.permissions = [
+            Permission.objects.create(content_type=self.content_type, codename="can_%s" % name, name=name)
+            for name in ("a", "b", "c")
+        ]
+        FormSet = inlineformset_factory(ContentType, Permission, fields=("name", "codename"), extra=2)
+        self.FormSet = type("FormSet", (BulkSaveFormSetMixin, FormSet), {})
+        self.prefix = self.FormSet.get_default_prefix()
+
+    def get_data(self, **changes):
+        data = {
+            "%s-TOTAL_FORMS" % self.prefix: "5",
+            "%s-INITIAL_FORMS" % self.prefix: "3",
+            "%s-MAX_NUM_FORMS" % self.prefix: "",
+        }
+        for index, permission in enumerate(self.permissions):
+            data["%s-%d-id" % (self.prefix, index)] = str(permission.pk)
+            data["%s-%d-name" % (self.prefix, index)] = permission.name
+            data["%s-%d-codename" % (self.prefix, index)] = permission.codename
+        for key, value in changes.items():
+            data["%s-%s" % (self.prefix, key)] = value
+        return data
+
+    def test_should_save_in_bulk(self):
+        formset = self.FormSet(self.get_data(**{
+            "0-name": "renamed",
+            "1-name": "renamed",
+            "2-DELETE": "on",
+            "3-name": "d", "3-codename": "can_d",
+            "4-name": "e", "4-codename": "can_e",
+        }), instance=self.content_type)
+        self.assertTrue(formset.is_valid())
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            formset.save()
+            queries = [query["sql"].split()[0] for query in connection.queries[start:]]
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        self.assertEqual(queries.count("UPDATE"), 1)
+        self.assertEqual(queries.count("INSERT"), 2)  # One by new object, for their pk
+        self.assertEqual(
+            sorted(self.content_type.permission_set.values_list("codename", "name")),
+            [(u"can_a", u"renamed"), (u"can_b", u"renamed"), (u"can_d", u"d"), (u"can_e", u"e")]
+        )
+        # For the change message of the admin log entry
+        self.assertEqual(len(formset.new_objects), 2)
+        self.assertEqual(
+            [obj.pk for obj in formset.new_objects],
+            list(Permission.objects.filter(codename__in=["can_d", "can_e"]).order_by("codename").values_list("pk", flat=True))
+        )
+        self.assertEqual([changed for obj, changed in formset.changed_objects], [["name"], ["name"]])
+        self.assertEqual(formset.deleted_objects, self.permissions[2:])
+
+    def test_should_bulk_create_the_new_objects_on_demand(self):
+        self.FormSet.bulk_create_new_objects = True
+        formset = self.FormSet(self.get_data(**{
+            "3-name": "d", "3-codename": "can_d",
+            "4-name": "e", "4-codename": "can_e",
+        }), instance=self.content_type)
+        self.assertTrue(formset.is_valid())
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            saved = formset.save()
+            queries = [query["sql"].split()[0] for query in connection.queries[start:]]
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        self.assertEqual(queries.count("INSERT"), 1)
+        # bulk_create leaves the primary keys unset
+        self.assertEqual([obj.pk for obj in saved], [None, None])
+        self.assertEqual(self.content_type.permission_set.filter(codename__in=["can_d", "can_e"]).count(), 2)
+
+    def test_should_read_bulk_create_new_objects_from_the_inline(self):
+        request = RequestFactory().get("/")
+        request.user = User.objects.create(username="admin", is_superuser=True)
+        model_admin = ContentTypeAdmin(ContentType, AdminSite())
+        FormSet, = model_admin.get_formsets(request, self.content_type)
+        self.assertFalse(FormSet.bulk_create_new_objects)
+        PermissionsInline.formset = BulkCreateFormSet
+        try:
+            FormSet, = ContentTypeAdmin(ContentType, AdminSite()).get_formsets(request, self.content_type)
+            self.assertTrue(FormSet.bulk_create_new_objects)
+        finally:
+            del PermissionsInline.formset
+        PermissionsInline.bulk_create_new_objects = True
+        try:
+            FormSet, = ContentTypeAdmin(ContentType, AdminSite()).get_formsets(request, self.content_type)
+            self.assertTrue(FormSet.bulk_create_new_objects)
+        finally:
+            del PermissionsInline.bulk_create_new_objects
+        formset = FormSet(self.get_data(**{
+            "3-name": "d", "3-codename": "can_d",
+            "4-name": "e", "4-codename": "can_e",
+        }), instance=self.content_type, prefix=self.prefix)
+        self.assertTrue(formset.is_valid())
+        use_debug_cursor = connection.use_debug_cursor
+        connection.use_debug_cursor = True
+        try:
+            start = len(connection.queries)
+            formset.save()
+            queries = [query["sql"].split()[0] for query in connection.queries[start:]]
+        finally:
+            connection.use_debug_cursor = use_debug_cursor
+        self.assertEqual(queries.count("INSERT"), 1)
+
+    def test_should_fall_back_with_file_fields(self):
+        FormSet = inlineformset_factory(User, Attachment, fields=("name", "document"))
+        FormSet = type("FormSet", (BulkSaveFormSetMixin, FormSet), {})
+        self.assertFalse(FormSet(instance=User()).can_save_in_bulk())
+        FormSet = inlineformset_factory(User, Attachment, fields=("name",))
+        FormSet = type("FormSet", (BulkSaveFormSetMixin, FormSet), {})
+        self.assertTrue(FormSet(instance=User()).can_save_in_bulk())
+
+    def test_should_fall_back_with_save_hooks(self):
+        def receiver(sender, **kwargs): pass
+        signals.post_save.connect(receiver, sender=Permission)
+        try:
+            formset = self.FormSet(self.get_data(), instance=self.content_type)
+            self.assertFalse(formset.can_save_in_bulk())
+        finally:
+            signals.post_save.disconnect(receiver, sender=Permission)
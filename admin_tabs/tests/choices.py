@@ -0,0 +1,191 @@
+from django import forms
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs import choices
+from admin_tabs.choices import CachedChoicesFormMixin, clear_cached_choices, get_cached_choices
+from admin_tabs.choices import invalidate_choices, register_cached_choices
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "CachedChoicesTests",
+]
+
+
+class GroupsForm(CachedChoicesFormMixin, forms.Form):
+    cached_choices_fields = ("group", "groups")
+    group = forms.ModelChoiceField(Group.objects.all())
+    groups = forms.ModelMultipleChoiceField(Group.objects.all())
+
+
+class CachedChoicesPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "groups"], cached_choices=["groups"])
+        permissions = Config(inline="PermissionsInline", cached_choices=["permission"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "permissions"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class GroupsInline(TabularInline):
+    model = User.groups.through
+    raw_id_fields = ("user",)
+
+
+class GroupsPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        groups = Config(inline="GroupsInline", cached_choices=["group"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class GroupsAdmin(TabbedModelAdmin):
+    page_config_class = GroupsPageConfig
+    inlines = (GroupsInline,)
+
+
+class CachedChoicesTests(TestCase):
+
+    def setUp(self):
+        clear_cached_choices()
+        register_cached_choices(Group)
+        self.group = Group.objects.create(name="editors")
+
+    def test_choices_should_be_evaluated_once(self):
+        field = forms.ModelChoiceField(Group.objects.all())
+        self.assertEqual(get_cached_choices(field), [(self.group.pk, u"editors")])
+        with self.assertNumQueries(0):
+            get_cached_choices(forms.ModelChoiceField(Group.objects.all()))
+        with self.assertNumQueries(1):
+            get_cached_choices(forms.ModelChoiceField(Group.objects.filter(name="editors")))
+
+    def test_choices_should_be_invalidated(self):
+        field = forms.ModelChoiceField(Group.objects.all())
+        get_cached_choices(field)
+        Group.objects.create(name="writers")
+        self.assertEqual([label for value, label in get_cached_choices(field)], [u"editors", u"writers"])
+        self.group.delete()
+        self.assertEqual([label for value, label in get_cached_choices(field)], [u"writers"])
+
+    def test_forms_should_share_the_choices(self):
+        GroupsForm()
+        with self.assertNumQueries(0):
+            form = GroupsForm()
+            html = form.as_p()
+        self.assertEqual(list(form.fields["group"].choices), [(u"", u"---------"), (self.group.pk, u"editors")])
+        self.assertTrue("editors" in html)
+
+    def test_page_config_should_collect_the_cached_choices(self):
+        self.assertEqual(CachedChoicesPageConfig.cached_choices, {
+            None: set(["groups"]),
+            "PermissionsInline": set(["permission"]),
+        })
+
+    def test_inline_forms_should_keep_the_admin_widgets(self):
+        request = RequestFactory().get("/")
+        request.user = User.objects.create(username="admin", is_superuser=True)
+        FormSet, = GroupsAdmin(User, AdminSite()).get_formsets(request)
+        self.assertEqual(FormSet.form.cached_choices_fields, ("group",))
+        self.assertTrue(isinstance(FormSet.form.base_fields["user"].widget, ForeignKeyRawIdWidget))
+
+    def test_cache_backend(self):
+        with self.settings(ADMIN_TABS_CHOICES_CACHE="django.core.cache.backends.locmem.LocMemCache"):
+            field = forms.ModelChoiceField(Group.objects.all())
+            get_cached_choices(field)
+            with self.assertNumQueries(0):
+                get_cached_choices(field)
+            Group.objects.create(name="writers")
+            self.assertEqual(len(get_cached_choices(field)), 2)
+
+    def test_cache_backend_should_not_reuse_the_versions(self):
+        with self.settings(ADMIN_TABS_CHOICES_CACHE="django.core.cache.backends.locmem.LocMemCache"):
+            cache = choices.get_choices_cache()
+            version_key = "%s:auth.group:version" % choices.CACHE_KEY_PREFIX
+            time = choices.time.time
+            try:
+                choices.time.time = lambda: 1000.0
+                field = forms.ModelChoiceField(Group.objects.all())
+                get_cached_choices(field)
+                Group.objects.create(name="writers")
+                self.assertEqual(len(get_cached_choices(field)), 2)
+                # Evicted or expired, then invalidated
+                cache.delete(version_key)
+                get_cached_choices(field)
+                cache.delete(version_key)
+                choices.time.time = lambda: 1001.0
+                Group.objects.create(name="readers")
+                self.assertEqual(len(get_cached_choices(field)), 3)
+                # Evicted or expired, then read
+                cache.delete(version_key)
+                choices.time.time = lambda: 1002.0
+                Group.objects.filter(name="readers").delete()
+                cache.delete(version_key)
+                self.assertEqual(len(get_cached_choices(field)), 2)
+            finally:
+                choices.time.time = time
+
+    def test_choices_invalidated_while_evaluated_should_not_be_kept(self):
+        evaluate_choices = choices.evaluate_choices
+        def racing_evaluate_choices(field):
+            result = evaluate_choices(field)
+            invalidate_choices(Group)  # Saved by another thread meanwhile
+            return result
+        choices.evaluate_choices = racing_evaluate_choices
+        try:
+            get_cached_choices(forms.ModelChoiceField(Group.objects.all()))
+        finally:
+            choices.evaluate_choices = evaluate_choices
+        with self.assertNumQueries(1):
+            get_cached_choices(forms.ModelChoiceField(Group.objects.all()))
+
+    def test_process_choices_should_expire(self):
+        time = choices.time.time
+        with self.settings(ADMIN_TABS_CHOICES_TTL=60):
+            try:
+                choices.time.time = lambda: 1000.0
+                field = forms.ModelChoiceField(Group.objects.all())
+                get_cached_choices(field)
+                with self.assertNumQueries(0):
+                    get_cached_choices(field)
+                choices.time.time = lambda: 1060.0
+                with self.assertNumQueries(1):
+                    get_cached_choices(field)
+            finally:
+                choices.time.time = time
+
+    def test_non_relation_fields_should_be_refused(self):
+        class UsernamePageConfig(TabbedPageConfig):
+
+            class FieldsetsConfig:
+                main = Config(fields=["username"], cached_choices=["username"])
+
+            class ColsConfig:
+                main_col = Config(fieldsets=["main"])
+
+            class TabsConfig:
+                main_tab = Config(name="Main", cols=["main_col"])
+
+        class UsernameAdmin(TabbedModelAdmin):
+            page_config_class = UsernamePageConfig
+
+        try:
+            UsernameAdmin(User, AdminSite())
+        except ImproperlyConfigured as e:
+            self.assertEqual(str(e), "UsernamePageConfig.cached_choices: User.username is not a relation field")
+        else:
+            self.fail("ImproperlyConfigured not raised")
@@ -0,0 +1,60 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "OnlyLayoutFieldsTests",
+]
+
+
+class ColumnsPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", ("first_name", "last_name")])
+        status = Config(fields=["is_active"], visible=lambda request, obj: False)
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "status"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class ColumnsAdmin(TabbedModelAdmin):
+    page_config_class = ColumnsPageConfig
+    readonly_fields = ("last_login", "full_name")
+    only_layout_fields = True
+    layout_extra_fields = ("email",)
+
+    def full_name(self, obj):
+        return obj.get_full_name()
+
+
+class OnlyLayoutFieldsTests(TestCase):
+
+    def setUp(self):
+        self.model_admin = ColumnsAdmin(User, AdminSite())
+        self.user = User.objects.create(username="john", first_name="John", password="secret")
+
+    def test_layout_fields(self):
+        request = RequestFactory().get("/")
+        self.assertEqual(self.model_admin.get_layout_fields(request),
+            ["username", "first_name", "last_name", "email", "is_active", "last_login"])
+
+    def test_should_defer_the_other_fields(self):
+        obj = self.model_admin.get_object(RequestFactory().get("/"), str(self.user.pk))
+        with self.assertNumQueries(0):
+            self.assertEqual(obj.username, "john")
+        with self.assertNumQueries(1):
+            self.assertEqual(obj.password, "secret")
+
+    def test_should_load_the_whole_object_to_save_it(self):
+        obj = self.model_admin.get_object(RequestFactory().post("/"), str(self.user.pk))
+        self.assertFalse(obj._deferred)
+
+    def test_unknown_object(self):
+        self.assertEqual(self.model_admin.get_object(RequestFactory().get("/"), "0"), None)
+        self.assertEqual(self.model_admin.get_object(RequestFactory().get("/"), "a"), None)
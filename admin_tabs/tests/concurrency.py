@@ -0,0 +1,194 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Group, User
+from django.db import models
+from django.forms.models import modelform_factory
+from django.http import HttpResponseRedirect
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.concurrency import VersionConflict, VersionedFormMixin, VERSION_TOKEN_FIELD
+from admin_tabs.concurrency import claim_version, make_version_token, parse_version_token, value_hash
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "VersionTokenTests",
+    "VersionedFormTests",
+    "OptimisticLockingViewTests",
+]
+
+
+class VersionedNote(models.Model):
+    title = models.CharField(max_length=100)
+    version = models.IntegerField(default=0)
+    groups = models.ManyToManyField(Group, blank=True)
+
+    class Meta:
+        app_label = "admin_tabs"
+
+
+class VersionTokenTests(TestCase):
+
+    def test_token_should_round_trip(self):
+        token = make_version_token(3, {"b": "x", "a": None})
+        version, hashes = parse_version_token(token)
+        self.assertEqual(version, "3")
+        self.assertEqual(sorted(hashes), ["a", "b"])
+
+    def test_many_to_many_hash_should_not_depend_on_the_order(self):
+        self.assertEqual(value_hash([2, 10, 1]), value_hash([1, 2, 10]))
+        self.assertNotEqual(value_hash([1, 2]), value_hash([1, 3]))
+
+    def test_token_without_version(self):
+        version, hashes = parse_version_token(make_version_token(None, {}))
+        self.assertEqual(version, None)
+        self.assertEqual(hashes, {})
+
+
+class VersionedFormTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="editor", first_name="John", last_name="Doe")
+        UserForm = modelform_factory(User, fields=("first_name", "last_name"))
+        self.Form = type("UserForm", (VersionedFormMixin, UserForm), {})
+
+    def get_data(self, token, **changes):
+        data = {
+            "first_name": "John",
+            "last_name": "Doe",
+            VERSION_TOKEN_FIELD: token,
+        }
+        data.update(changes)
+        return data
+
+    def test_unchanged_object_should_validate(self):
+        token = self.Form(instance=self.user).initial[VERSION_TOKEN_FIELD]
+        form = self.Form(self.get_data(token, first_name="Jack"), instance=User.objects.get(pk=self.user.pk))
+        self.assertTrue(form.is_valid())
+
+    def test_changed_field_should_be_reported(self):
+        token = self.Form(instance=self.user).initial[VERSION_TOKEN_FIELD]
+        User.objects.filter(pk=self.user.pk).update(last_name="Smith")
+        form = self.Form(self.get_data(token, first_name="Jack"), instance=User.objects.get(pk=self.user.pk))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(sorted(form.errors), ["__all__", "last_name"])
+        # Posting the form again overwrites the other change
+        new_token = form[VERSION_TOKEN_FIELD].value()
+        self.assertNotEqual(new_token, token)
+        form = self.Form(self.get_data(new_token, first_name="Jack"), instance=User.objects.get(pk=self.user.pk))
+        self.assertTrue(form.is_valid())
+
+    def test_new_version_should_be_reported(self):
+        Form = type("UserForm", (self.Form,), {"version_field": "version"})
+        self.user.version = 1
+        token = Form(instance=self.user).initial[VERSION_TOKEN_FIELD]
+        self.user.version = 2
+        form = Form(self.get_data(token), instance=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertEqual(list(form.errors), ["__all__"])
+
+    def test_missing_token_should_not_be_checked(self):
+        form = self.Form(self.get_data(""), instance=self.user)
+        self.assertTrue(form.is_valid())
+
+
+class NotePageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["title", "groups"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class NoteAdmin(TabbedModelAdmin):
+    page_config_class = NotePageConfig
+    optimistic_locking = True
+    version_field = "version"
+
+    def response_change(self, request, obj):
+        return HttpResponseRedirect("../")
+
+
+class OptimisticLockingViewTests(TestCase):
+
+    def setUp(self):
+        self.model_admin = NoteAdmin(VersionedNote, AdminSite())
+        self.model_admin.message_user = lambda request, message: None
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.groups = [Group.objects.create(name=name) for name in ("editors", "writers")]
+        self.note = VersionedNote.objects.create(title="Note")
+        self.note.groups = self.groups
+
+    def get_token(self):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        response = self.model_admin.change_view(request, str(self.note.pk))
+        return response.context_data["adminform"].form.initial[VERSION_TOKEN_FIELD]
+
+    def post(self, token, title):
+        request = RequestFactory().post("/", {
+            "title": title,
+            "groups": [str(group.pk) for group in self.groups],
+            VERSION_TOKEN_FIELD: token,
+        })
+        request.user = self.admin
+        request._dont_enforce_csrf_checks = True
+        return self.model_admin.change_view(request, str(self.note.pk))
+
+    def get_note(self):
+        return VersionedNote.objects.get(pk=self.note.pk)
+
+    def test_concurrent_posts(self):
+        first_token = self.get_token()
+        second_token = self.get_token()
+        self.assertEqual(self.post(first_token, "First").status_code, 302)
+        self.assertEqual((self.get_note().title, self.get_note().version), ("First", 1))
+        response = self.post(second_token, "Second")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.context_data["adminform"].form.errors), ["__all__", "title"])
+        self.assertEqual((self.get_note().title, self.get_note().version), ("First", 1))
+
+    def test_hash_fallback_without_version_field(self):
+        self.model_admin.version_field = None
+        self.model_admin._form_classes.clear()
+        token = self.get_token()
+        VersionedNote.objects.filter(pk=self.note.pk).update(title="Changed")
+        response = self.post(token, "Mine")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.context_data["adminform"].form.errors), ["__all__", "title"])
+        self.assertEqual(self.get_note().title, "Changed")
+
+    def test_save_racing_with_the_validation(self):
+        """
+        The version changed between the validation and the save: the view
+        runs again and reports the conflict.
+        """
+        save_model = self.model_admin.save_model
+        def racing_save_model(request, obj, form, change):
+            if not VersionedNote.objects.filter(title="Racing").exists():
+                VersionedNote.objects.filter(pk=obj.pk).update(title="Racing", version=models.F("version") + 1)
+            return save_model(request, obj, form, change)
+        self.model_admin.save_model = racing_save_model
+        response = self.post(self.get_token(), "Mine")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.context_data["adminform"].form.errors), ["__all__", "title"])
+        self.assertEqual((self.get_note().title, self.get_note().version), ("Racing", 1))
+
+    def test_tampered_token_should_be_a_conflict(self):
+        token = self.get_token()
+        for tampered in ("x" + token, "abc", "1.5|", "|"):
+            response = self.post(tampered, "Mine")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.context_data["adminform"].form.errors), ["__all__"])
+            # The current token is sent back
+            self.assertEqual(response.context_data["adminform"].form[VERSION_TOKEN_FIELD].value(), token)
+        self.assertEqual(self.get_note().title, "Note")
+
+    def test_claim_version(self):
+        claim_version(VersionedNote, self.note, "version", "0")
+        self.assertEqual((self.note.version, self.get_note().version), (1, 1))
+        self.assertRaises(VersionConflict, claim_version, VersionedNote, self.note, "version", "0")
+        self.assertRaises(VersionConflict, claim_version, VersionedNote, self.note, "version", "one")
@@ -0,0 +1,121 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.conditions import add_only, change_only, obj_attr
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "PageConfigConditionsTests",
+    "ModelAdminLayoutVariantsTests",
+]
+
+
+class ConditionalPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        staff = Config(fields=["is_staff"], visible=obj_attr("is_staff"))
+        groups = Config(inline="GroupInline", visible=change_only)
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "staff"])
+        groups_col = Config(fieldsets=["groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        groups_tab = Config(name="Groups", cols=["groups_col"], enabled=add_only)
+
+
+class PageConfigConditionsTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = AnonymousUser()
+
+    def test_should_collect_conditions(self):
+        """
+        The predicates declared in the config classes are collected by the
+        metaclass, the boolean values are not.
+        """
+        self.assertEqual(ConditionalPageConfig.conditions, (
+            ("FieldsetsConfig", "groups", "visible"),
+            ("FieldsetsConfig", "staff", "visible"),
+            ("TabsConfig", "groups_tab", "enabled"),
+        ))
+        self.assertEqual(TabbedPageConfig.conditions, ())
+
+    def test_enabled_should_be_restricted_to_the_tabs(self):
+        def declare_fieldset():
+            class WrongPageConfig(TabbedPageConfig):
+                class FieldsetsConfig:
+                    main = Config(fields=["username"], enabled=change_only)
+        def declare_col():
+            class WrongPageConfig(TabbedPageConfig):
+                class ColsConfig:
+                    main_col = Config(fieldsets=[], enabled=True)
+        self.assertRaises(ImproperlyConfigured, declare_fieldset)
+        self.assertRaises(ImproperlyConfigured, declare_col)
+
+    def test_evaluate_conditions(self):
+        staff = User(username="staff", is_staff=True)
+        self.assertEqual(
+            ConditionalPageConfig.evaluate_conditions(self.request, None),
+            (False, False, True)
+        )
+        self.assertEqual(
+            ConditionalPageConfig.evaluate_conditions(self.request, staff),
+            (True, True, False)
+        )
+
+    def test_hidden_fieldsets_should_be_removed(self):
+        page_config = ConditionalPageConfig(self.request, None, obj_or_id=None)
+        main_tab, groups_tab = list(page_config)
+        self.assertEqual([f.fields for f in main_tab[0].fieldsets], [["username"]])
+        self.assertEqual(len(groups_tab[0]), 0)
+        self.assertTrue(groups_tab.enabled)
+        self.assertEqual(page_config.hidden_inlines, set(["GroupInline"]))
+
+    def test_visible_fieldsets_should_be_kept(self):
+        staff = User(username="staff", is_staff=True)
+        page_config = ConditionalPageConfig(self.request, None, obj_or_id=staff)
+        main_tab, groups_tab = list(page_config)
+        self.assertEqual(
+            [f.fields for f in main_tab[0].fieldsets],
+            [["username"], ["is_staff"]]
+        )
+        self.assertEqual(len(groups_tab[0]), 1)
+        self.assertFalse(groups_tab.enabled)
+        self.assertEqual(page_config.hidden_inlines, set())
+
+
+class ModelAdminLayoutVariantsTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = AnonymousUser()
+        self.model_admin = TabbedModelAdmin(User, AdminSite())
+        self.model_admin.page_config_class = ConditionalPageConfig
+
+    def test_page_configs_should_be_cached_by_outcomes(self):
+        """
+        Objects with the same predicates outcomes share the same page config.
+        """
+        first = User(username="first", is_staff=True)
+        second = User(username="second", is_staff=True)
+        other = User(username="other", is_staff=False)
+        page_config = self.model_admin.get_page_config(self.request, first)
+        self.assertTrue(page_config is self.model_admin.get_page_config(self.request, second))
+        self.assertFalse(page_config is self.model_admin.get_page_config(self.request, other))
+        self.assertFalse(page_config is self.model_admin.get_page_config(self.request))
+        self.assertEqual(len(self.model_admin._page_configs), 3)
+
+    def test_get_form_should_follow_the_layout(self):
+        staff = User(username="staff", is_staff=True)
+        form = self.model_admin.get_form(self.request, staff)
+        self.assertEqual(form.base_fields.keys(), ["username", "is_staff"])
+        form = self.model_admin.get_form(self.request, None)
+        self.assertEqual(form.base_fields.keys(), ["username"])
+        self.assertEqual(self.model_admin.declared_fieldsets, [])
@@ -0,0 +1,106 @@
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import PermissionDenied
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.display import display_inline, get_inline_fields
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "DisplayOnlyViewTests",
+]
+
+
+class UserGroupInline(TabularInline):
+    model = User.groups.through
+
+
+class EditorsInline(UserGroupInline):
+
+    def queryset(self, request):
+        return super(EditorsInline, self).queryset(request).filter(group__name="editors")
+
+
+class DisplayPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", ("first_name", "last_name"), "is_active"])
+        groups = Config(inline="UserGroupInline", name="Groups")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        groups_col = Config(fieldsets=["groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        groups_tab = Config(name="Groups", cols=["groups_col"])
+
+
+class DisplayAdmin(TabbedModelAdmin):
+    page_config_class = DisplayPageConfig
+    inlines = (UserGroupInline,)
+
+
+class DisplayOnlyViewTests(TestCase):
+
+    def setUp(self):
+        self.model_admin = DisplayAdmin(User, AdminSite())
+        self.user = User.objects.create(username="john", first_name="John", last_name="Doe")
+        self.user.groups.add(Group.objects.create(name="editors"))
+        self.viewer = User.objects.create(username="viewer", is_staff=True)
+        self.viewer.user_permissions.add(Permission.objects.create(
+            content_type=ContentType.objects.get_for_model(User),
+            codename="view_user", name="Can view user"))
+        self.viewer.user_permissions.add(Permission.objects.create(
+            content_type=ContentType.objects.get_for_model(Group),
+            codename="view_group", name="Can view group"))
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+
+    def get_request(self, user, method="get"):
+        request = getattr(RequestFactory(), method)("/")
+        request.user = user
+        request._dont_enforce_csrf_checks = True
+        return request
+
+    def test_view_only_user_should_not_get_the_form(self):
+        response = self.model_admin.change_view(self.get_request(self.viewer), str(self.user.pk))
+        self.assertFalse("adminform" in response.context_data)
+        self.assertEqual(response.template_name[-1], "admin_tabs/display_form.html")
+        response.render()
+        self.assertTrue("Doe" in response.content)
+        self.assertTrue("editors" in response.content)
+        self.assertFalse("<input" in response.content)
+
+    def test_user_with_change_permission_should_get_the_form(self):
+        response = self.model_admin.change_view(self.get_request(self.admin), str(self.user.pk))
+        self.assertTrue("adminform" in response.context_data)
+
+    def test_view_only_user_should_not_post(self):
+        self.assertRaises(PermissionDenied, self.model_admin.change_view,
+            self.get_request(self.viewer, "post"), str(self.user.pk))
+
+    def test_inline_should_be_fetched_in_one_query(self):
+        inline = UserGroupInline(User, self.model_admin.admin_site)
+        request = self.get_request(self.admin)
+        self.assertEqual(get_inline_fields(request, inline, self.user), ["group"])
+        with self.assertNumQueries(1):
+            labels, rows = display_inline(request, inline, self.user)
+        self.assertEqual(rows, [["editors"]])
+
+    def test_inline_queryset_override_should_apply_without_change_permission(self):
+        self.user.groups.add(Group.objects.create(name="secret"))
+        inline = EditorsInline(User, self.model_admin.admin_site)
+        request = self.get_request(self.viewer)
+        self.assertFalse(inline.has_change_permission(request))
+        labels, rows = display_inline(request, inline, self.user)
+        self.assertEqual(rows, [["editors"]])
+        self.assertFalse("has_change_permission" in inline.__dict__)
+
+    def test_inline_display_queryset_hook(self):
+        inline = EditorsInline(User, self.model_admin.admin_site)
+        inline.get_display_queryset = lambda request, obj: User.groups.through.objects.none()
+        labels, rows = display_inline(self.get_request(self.viewer), inline, self.user)
+        self.assertEqual(rows, [])
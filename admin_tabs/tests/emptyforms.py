@@ -0,0 +1,97 @@
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs import choices
+from admin_tabs.choices import clear_cached_choices
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "CachedEmptyFormTests",
+]
+
+
+class EmptyFormGroupInline(TabularInline):
+    model = User.groups.through
+
+
+class EmptyFormPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        groups = Config(inline="EmptyFormGroupInline", cached_choices=["group"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class EmptyFormAdmin(TabbedModelAdmin):
+    page_config_class = EmptyFormPageConfig
+    inlines = (EmptyFormGroupInline,)
+    cache_empty_forms = True
+
+
+class CachedEmptyFormTests(TestCase):
+
+    def setUp(self):
+        clear_cached_choices()
+        self.model_admin = EmptyFormAdmin(User, AdminSite())
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.group = Group.objects.create(name="editors")
+
+    def get_empty_form(self, obj):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        formset_class = list(self.model_admin.get_formsets(request, obj))[0]
+        return formset_class(instance=obj, prefix="groups").empty_form
+
+    def test_widgets_should_be_rendered_once(self):
+        html = unicode(self.get_empty_form(self.admin)["group"])
+        self.assertTrue("editors" in html)
+        self.assertEqual(len(self.model_admin._empty_forms), 1)
+        form = self.get_empty_form(self.admin)
+        form.fields["group"].widget.render = None  # Not called anymore
+        self.assertEqual(unicode(form["group"]), html)
+
+    def test_widgets_should_follow_the_choices(self):
+        unicode(self.get_empty_form(self.admin)["group"])
+        Group.objects.create(name="writers")
+        self.assertTrue("writers" in unicode(self.get_empty_form(self.admin)["group"]))
+
+    def test_foreign_key_should_not_be_cached(self):
+        other = User.objects.create(username="other")
+        self.assertTrue('value="%s"' % self.admin.pk in unicode(self.get_empty_form(self.admin)["user"]))
+        self.assertTrue('value="%s"' % other.pk in unicode(self.get_empty_form(other)["user"]))
+
+    def test_forms_with_data_should_not_be_cached(self):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        formset_class = list(self.model_admin.get_formsets(request, self.admin))[0]
+        formset = formset_class(instance=self.admin, prefix="groups")
+        unicode(formset.forms[0]["group"])
+        self.assertEqual(self.model_admin._empty_forms, {})
+
+    def test_choices_saved_while_evaluated_should_change_the_key(self):
+        evaluate_choices = choices.evaluate_choices
+        def racing_evaluate_choices(field):
+            result = evaluate_choices(field)
+            choices.evaluate_choices = evaluate_choices
+            Group.objects.create(name="writers")  # Saved by another thread meanwhile
+            return result
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        formset_class = list(self.model_admin.get_formsets(request, self.admin))[0]
+        formset = formset_class(instance=self.admin, prefix="groups")
+        clear_cached_choices()  # Evaluated again by the empty form
+        choices.evaluate_choices = racing_evaluate_choices
+        try:
+            html = unicode(formset.empty_form["group"])
+        finally:
+            choices.evaluate_choices = evaluate_choices
+        self.assertFalse("writers" in html)
+        self.assertTrue("writers" in unicode(self.get_empty_form(self.admin)["group"]))
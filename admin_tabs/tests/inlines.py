@@ -0,0 +1,180 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Permission, User
+from django.contrib.admin.options import TabularInline
+from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet, inlineformset_factory
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.helpers import SkipUnchangedFormSetMixin, INLINE_DIRTY_MARKER
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "SkipUnchangedFormSetTests",
+    "SkipUnchangedInlinesFlagTests",
+    "FormsetsByTabTests",
+]
+
+
+class SkipUnchangedFormSetTests(TestCase):
+
+    def setUp(self):
+        self.content_type = ContentType.objects.create(app_label="tests", model="thing", name="thing")
+        self.permission = Permission.objects.create(content_type=self.content_type,
+            codename="can_thing", name="Can thing")
+        FormSet = inlineformset_factory(ContentType, Permission, fields=("name", "codename"), extra=1)
+        self.FormSet = type("FormSet", (SkipUnchangedFormSetMixin, FormSet), {})
+        self.prefix = self.FormSet.get_default_prefix()
+
+    def get_data(self, marker, **changes):
+        data = {
+            "%s-TOTAL_FORMS" % self.prefix: "2",
+            "%s-INITIAL_FORMS" % self.prefix: "1",
+            "%s-MAX_NUM_FORMS" % self.prefix: "",
+            "%s-0-id" % self.prefix: str(self.permission.pk),
+            "%s-0-name" % self.prefix: "Can thing",
+            "%s-0-codename" % self.prefix: "can_thing",
+        }
+        if marker is not None:
+            data["%s-%s" % (self.prefix, INLINE_DIRTY_MARKER)] = marker
+        for key, value in changes.items():
+            data["%s-%s" % (self.prefix, key)] = value
+        return data
+
+    def test_untouched_formset_should_be_skipped(self):
+        formset = self.FormSet(self.get_data("0"), instance=self.content_type)
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(formset._errors, None)  # Not validated
+        self.assertEqual(formset.save(), [])
+        self.assertEqual(formset.new_objects, [])
+        self.assertEqual(formset.changed_objects, [])
+        self.assertEqual(formset.deleted_objects, [])
+
+    def test_changed_formset_should_be_saved(self):
+        """
+        has_changed() has the last word.
+        """
+        formset = self.FormSet(self.get_data("0", **{"0-name": "Can do things"}), instance=self.content_type)
+        self.assertFalse(formset.is_untouched())
+        self.assertTrue(formset.is_valid())
+        formset.save()
+        self.assertEqual(Permission.objects.get(pk=self.permission.pk).name, "Can do things")
+
+    def test_dirty_or_unmarked_formsets_should_be_validated(self):
+        for marker in ("1", None):
+            formset = self.FormSet(self.get_data(marker), instance=self.content_type)
+            self.assertFalse(formset.is_untouched())
+            self.assertTrue(formset.is_valid())
+            self.assertNotEqual(formset._errors, None)
+
+    def test_save_as_new_should_not_be_skipped(self):
+        formset = self.FormSet(self.get_data("0"), instance=self.content_type, save_as_new=True)
+        self.assertFalse(formset.is_untouched())
+
+
+class AtLeastTwoPermissionsFormSet(BaseInlineFormSet):
+
+    def clean(self):
+        if len([form for form in self.forms if not form.cleaned_data.get("DELETE")]) < 2:
+            raise ValidationError("At least two permissions")
+
+
+class StrictPermissionInline(TabularInline):
+    model = Permission
+    formset = AtLeastTwoPermissionsFormSet
+    fields = ("name", "codename")
+    extra = 0
+
+
+class StrictPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["name"])
+        permissions = Config(inline="StrictPermissionInline")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "permissions"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class StrictContentTypeAdmin(TabbedModelAdmin):
+    page_config_class = StrictPageConfig
+    inlines = (StrictPermissionInline,)
+
+
+class SkipUnchangedInlinesFlagTests(TestCase):
+    """
+    An untouched formset whose clean() fails only blocks the save when
+    skip_unchanged_inlines is off.
+    """
+
+    def setUp(self):
+        self.content_type = ContentType.objects.create(app_label="tests", model="thing", name="thing")
+        self.permission = Permission.objects.create(content_type=self.content_type,
+            codename="can_thing", name="Can thing")
+
+    def get_formset(self, skip_unchanged_inlines):
+        model_admin = StrictContentTypeAdmin(ContentType, AdminSite())
+        model_admin.skip_unchanged_inlines = skip_unchanged_inlines
+        request = RequestFactory().get("/")
+        request.user = User(username="admin", is_superuser=True)
+        FormSet = list(model_admin.get_formsets(request, self.content_type))[0]
+        prefix = FormSet.get_default_prefix()
+        data = {
+            "%s-TOTAL_FORMS" % prefix: "1",
+            "%s-INITIAL_FORMS" % prefix: "1",
+            "%s-MAX_NUM_FORMS" % prefix: "",
+            "%s-0-id" % prefix: str(self.permission.pk),
+            "%s-0-name" % prefix: "Can thing",
+            "%s-0-codename" % prefix: "can_thing",
+            "%s-%s" % (prefix, INLINE_DIRTY_MARKER): "0",
+        }
+        return FormSet(data, instance=self.content_type, prefix=prefix)
+
+    def test_should_validate_untouched_formsets_by_default(self):
+        self.assertFalse(TabbedModelAdmin.skip_unchanged_inlines)
+        formset = self.get_formset(False)
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.non_form_errors(), ["At least two permissions"])
+
+    def test_should_skip_the_clean_of_untouched_formsets(self):
+        self.assertTrue(self.get_formset(True).is_valid())
+
+
+class InlinesPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        a = Config(inline="AInline")
+        b = Config(inline="BInline")
+        c = Config(inline="CInline")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "a"])
+        other_col = Config(fieldsets=["b", "c"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        other_tab = Config(name="Other", cols=["other_col"])
+
+
+class FormsetsByTabTests(TestCase):
+
+    def test_should_group_formsets_by_tab(self):
+        model_admin = TabbedModelAdmin(User, AdminSite())
+        model_admin.page_config_class = InlinesPageConfig
+        request = RequestFactory().get("/")
+        request._admin_tabs_page_config = page_config = model_admin.get_page_config(request)
+        formsets = []
+        for inline_name in ("AInline", "BInline", "CInline", "UnknownInline"):
+            formset = type("FormSet", (object,), {"inline_name": inline_name})()
+            formsets.append(formset)
+        groups = model_admin._group_formsets_by_tab(request, formsets)
+        self.assertEqual(groups, [
+            (page_config.Tabs.main_tab, formsets[:1]),
+            (page_config.Tabs.other_tab, formsets[1:3]),
+            (None, formsets[3:]),
+        ])
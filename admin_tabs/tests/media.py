@@ -0,0 +1,120 @@
+from django import forms
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.utils import simplejson
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "TabMediaTests",
+    "KeptMediaTests",
+]
+
+
+class DatesPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+        dates = Config(fields=["date_joined"], css_classes=["collapse"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        dates_col = Config(fieldsets=["dates"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        dates_tab = Config(name="Dates", cols=["dates_col"])
+
+
+class DatesAdmin(TabbedModelAdmin):
+    page_config_class = DatesPageConfig
+    defer_tab_media = True
+
+
+class TabMediaTests(TestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_superuser=True)
+        self.model_admin = DatesAdmin(User, AdminSite())
+
+    def get_context(self):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        return self.model_admin.change_view(request, str(self.admin.pk)).context_data
+
+    def test_tab_media(self):
+        context = self.get_context()
+        main_tab, dates_tab = context["page_config"]
+        form = context["adminform"].form
+        dates_media = dates_tab.get_media(None, form, [])
+        self.assertTrue(any("DateTimeShortcuts" in path for path in dates_media._js))
+        self.assertTrue(any("collapse" in path for path in dates_media._js))
+        self.assertFalse(any("DateTimeShortcuts" in path for path in main_tab.get_media(None, form, [])._js))
+
+    def test_should_defer_the_media_of_the_other_tabs(self):
+        context = self.get_context()
+        self.assertFalse(any("DateTimeShortcuts" in path for path in context["media"]._js))
+        main_media, dates_media = simplejson.loads(context["deferred_tab_media"])
+        self.assertEqual(main_media["js"], [])
+        self.assertTrue(any("DateTimeShortcuts" in url for url in dates_media["js"]))
+
+
+class UserForm(forms.ModelForm):
+
+    class Meta:
+        model = User
+
+    class Media:
+        js = ("custom/form.js",)
+
+
+class GroupsPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+        groups = Config(fields=["date_joined", "groups"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        groups_col = Config(fieldsets=["groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        groups_tab = Config(name="Groups", cols=["groups_col"])
+
+
+class GroupsAdmin(TabbedModelAdmin):
+    page_config_class = GroupsPageConfig
+    defer_tab_media = True
+    form = UserForm
+    filter_horizontal = ("groups",)
+
+
+class KeptMediaTests(TestCase):
+    """
+    The form media and the widgets rendering inline scripts are loaded with
+    the page.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create(username="admin", is_superuser=True)
+        self.model_admin = GroupsAdmin(User, AdminSite())
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        self.context = self.model_admin.change_view(request, str(self.admin.pk)).context_data
+
+    def test_should_keep_the_form_media(self):
+        self.assertTrue("custom/form.js" in self.context["media"]._js)
+
+    def test_should_keep_the_filtered_select_media(self):
+        self.assertTrue(any("SelectFilter2" in path for path in self.context["media"]._js))
+        self.assertTrue(any("SelectBox" in path for path in self.context["media"]._js))
+
+    def test_should_only_defer_the_deferrable_widgets(self):
+        self.assertFalse(any("DateTimeShortcuts" in path for path in self.context["media"]._js))
+        main_media, groups_media = simplejson.loads(self.context["deferred_tab_media"])
+        self.assertEqual(main_media["js"], [])
+        self.assertTrue(any("DateTimeShortcuts" in url for url in groups_media["js"]))
+        self.assertFalse(any("SelectFilter2" in url or "form.js" in url for url in groups_media["js"]))
@@ -0,0 +1,92 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs import metrics
+from admin_tabs.helpers import TabbedModelAdmin
+
+__all__ = [
+    "StatsdBackendTests",
+    "ViewMetricsTests",
+]
+
+
+class FakeSocket(object):
+
+    def __init__(self):
+        self.packets = []
+
+    def sendto(self, packet, address):
+        self.packets.append(packet)
+
+
+class StatsdBackendTests(TestCase):
+
+    def test_should_send_several_metrics_by_packet(self):
+        backend = metrics.StatsdBackend(packet_size=60)
+        backend.socket = FakeSocket()
+        backend.send([
+            ("app.model.change_view.time", 12.5, "ms"),
+            ("app.model.page_config_cache.hit", 1, "c"),
+            ("app.model.change_view.size", 2048, "ms"),
+        ])
+        self.assertEqual(backend.socket.packets, [
+            "admin_tabs.app.model.change_view.time:12.500|ms",
+            "admin_tabs.app.model.page_config_cache.hit:1|c",
+            "admin_tabs.app.model.change_view.size:2048.000|ms",
+        ])
+        backend.packet_size = 512
+        backend.send([("a", 1, "c"), ("b", 2, "c")])
+        self.assertEqual(backend.socket.packets[-1], "admin_tabs.a:1|c\nadmin_tabs.b:2|c")
+
+    def test_metric_name(self):
+        self.assertEqual(metrics.metric_name(u"Dates & State"), "dates_state")
+
+
+class ViewMetricsTests(TestCase):
+
+    def setUp(self):
+        self.backend = metrics.InMemoryBackend()
+        self.previous_backend = metrics.set_backend(self.backend)
+        self.admin = User.objects.create(username="admin", is_superuser=True)
+        self.model_admin = TabbedModelAdmin(User, AdminSite())
+
+    def tearDown(self):
+        metrics.set_backend(self.previous_backend)
+
+    def get(self):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        return self.model_admin.change_view(request, str(self.admin.pk))
+
+    def test_should_send_the_metrics_once_rendered(self):
+        response = self.get()
+        self.assertEqual(self.backend.metrics, [])
+        response.render()
+        self.assertEqual(len(self.backend.values("auth.user.change_view.time")), 1)
+        self.assertEqual(self.backend.values("auth.user.change_view.size"), [len(response.content)])
+        self.assertEqual(self.backend.values("auth.user.page_config_cache.miss"), [1])
+        self.assertEqual(metrics.get_batch(), None)
+
+    def test_layout_cache_hits(self):
+        self.get().render()
+        self.get().render()
+        # One layout for both requests
+        self.assertEqual(self.backend.values("auth.user.page_config_cache.miss"), [1])
+        self.assertEqual(len(self.backend.values("auth.user.page_config_cache.hit")), 2)
+
+    def test_queries_should_restore_the_debug_cursor(self):
+        use_debug_cursor = connection.use_debug_cursor
+        with self.settings(ADMIN_TABS_METRICS_QUERIES=True):
+            response = self.get()
+            self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
+            self.assertTrue(response.is_rendered)
+            self.assertTrue(self.backend.values("auth.user.change_view.queries")[0] > 0)
+
+            def broken_view():
+                raise ValueError("Broken view")
+            request = RequestFactory().get("/")
+            self.assertRaises(ValueError, self.model_admin._run_measured, request, "change_view", broken_view)
+            self.assertEqual(connection.use_debug_cursor, use_debug_cursor)
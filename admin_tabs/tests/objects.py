@@ -0,0 +1,83 @@
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+
+__all__ = [
+    "ObjectResolverTests",
+]
+
+
+class ObjectsPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+        status = Config(fields=["is_active"], visible=lambda request, obj: obj is not None and obj.is_staff)
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "status"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class ObjectsAdmin(TabbedModelAdmin):
+    page_config_class = ObjectsPageConfig
+
+    def __init__(self, *args, **kwargs):
+        super(ObjectsAdmin, self).__init__(*args, **kwargs)
+        self.loaded = []
+
+    def load_object(self, request, object_id):
+        self.loaded.append(object_id)
+        return super(ObjectsAdmin, self).load_object(request, object_id)
+
+
+class ObjectResolverTests(TestCase):
+
+    def setUp(self):
+        self.model_admin = ObjectsAdmin(User, AdminSite())
+        self.model_admin.message_user = lambda request, message: None
+        self.user = User.objects.create(username="john", is_staff=True)
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+
+    def get_request(self, method="get", data=None):
+        request = getattr(RequestFactory(), method)("/", data or {})
+        request.user = self.admin
+        request._dont_enforce_csrf_checks = True
+        return request
+
+    def test_should_load_the_object_once_per_request(self):
+        request = self.get_request()
+        obj = self.model_admin.get_object(request, str(self.user.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(self.model_admin.get_object(request, str(self.user.pk)) is obj)
+            self.assertTrue(self.model_admin.resolve_object(request, str(self.user.pk)) is obj)
+        self.assertFalse(self.model_admin.get_object(self.get_request(), str(self.user.pk)) is obj)
+        self.model_admin.forget_object(request, str(self.user.pk))
+        self.assertFalse(self.model_admin.get_object(request, str(self.user.pk)) is obj)
+
+    def test_resolve_object(self):
+        request = self.get_request()
+        self.assertEqual(self.model_admin.resolve_object(request, None), None)
+        self.assertTrue(self.model_admin.resolve_object(request, self.user) is self.user)
+        self.assertEqual(self.model_admin.resolve_object(request, "0"), None)
+
+    def test_change_view_should_share_the_object(self):
+        request = self.get_request()
+        response = self.model_admin.change_view(request, str(self.user.pk))
+        obj = self.model_admin.get_view_object(request)
+        self.assertEqual(obj, self.user)
+        self.assertTrue(response.context_data["original"] is obj)
+        response.render()
+        self.assertTrue('name="is_active"' in response.content)
+        self.assertEqual(self.model_admin.loaded, [str(self.user.pk)])
+
+    def test_change_view_post_should_load_the_object_once(self):
+        request = self.get_request("post", {"username": "johnny", "first_name": "John", "is_active": "on"})
+        response = self.model_admin.change_view(request, str(self.user.pk))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(User.objects.get(pk=self.user.pk).username, "johnny")
+        self.assertEqual(self.model_admin.loaded, [str(self.user.pk)])
@@ -0,0 +1,126 @@
+from StringIO import StringIO
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+from admin_tabs.management.commands.admin_tabs_profile import Command
+from admin_tabs.profiling import RenderProfile, Timing, get_profile, start_profile, stop_profile
+
+__all__ = [
+    "RenderProfileTests",
+    "ProfileCommandTests",
+]
+
+
+class ProfiledPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        a = Config(fields=["a"])
+        b = Config(fields=["b"])
+
+    class ColsConfig:
+        a_col = Config(name="A", fieldsets=["a"])
+        b_col = Config(name="B", fieldsets=["b"])
+
+    class TabsConfig:
+        first = Config(name="First", cols=["a_col", "b_col"])
+        second = Config(name="Second", cols=["b_col"])
+
+
+class RenderProfileTests(TestCase):
+
+    def test_should_aggregate_cols_by_tab(self):
+        """
+        A col rendered in two tabs is counted once in each of them.
+        """
+        page_config = ProfiledPageConfig(None, None)
+        a_col = page_config.Cols.a_col
+        b_col = page_config.Cols.b_col
+        profile = RenderProfile()
+        profile.add_col(a_col, Timing("col", "A", 0.1, 1, 10))
+        profile.add_col(b_col, Timing("col", "B", 0.2, 2, 20))
+        profile.add_col(b_col, Timing("col", "B", 0.4, 4, 40))
+        (first, first_timing, first_cols), (second, second_timing, second_cols) = profile.tabs(page_config)
+        self.assertEqual(first.name, "First")
+        self.assertAlmostEqual(first_timing.seconds, 0.3)
+        self.assertEqual(first_timing.queries, 3)
+        self.assertEqual(first_timing.size, 30)
+        self.assertEqual([col.name for col, timing in first_cols], ["A", "B"])
+        self.assertEqual(second.name, "Second")
+        self.assertEqual(second_timing.queries, 4)
+
+    def test_slowest_elements(self):
+        profile = RenderProfile()
+        profile.add_element(None, Timing("fieldset", "fast", 0.1))
+        profile.add_element(None, Timing("inline", "slow", 0.3))
+        profile.add_element(None, Timing("fieldset", "medium", 0.2))
+        self.assertEqual([t.name for t in profile.slowest_elements()], ["slow", "medium", "fast"])
+        self.assertEqual([t.name for t in profile.slowest_elements(1)], ["slow"])
+
+    def test_profile_should_be_thread_local(self):
+        self.assertEqual(get_profile(), None)
+        profile = start_profile()
+        self.assertTrue(get_profile() is profile)
+        self.assertTrue(stop_profile() is profile)
+        self.assertEqual(get_profile(), None)
+
+
+class UserPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+
+    class ColsConfig:
+        main_col = Config(name="Main", fieldsets=["main"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class UserAdmin(TabbedModelAdmin):
+    page_config_class = UserPageConfig
+
+
+profile_site = AdminSite(name="profile_admin")
+profile_site.register(User, UserAdmin)
+
+
+class ProfileCommandTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username="john")
+
+    def call_command(self, **options):
+        stdout = StringIO()
+        call_command("admin_tabs_profile", "auth.User", str(self.user.pk),
+            site="admin_tabs.tests.profiling.profile_site", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def handle(self, username=None):
+        """
+        Run the command without call_command, which exits on a CommandError.
+        """
+        command = Command()
+        command.stdout = StringIO()
+        command.handle("auth.User", str(self.user.pk), username=username,
+            site="admin_tabs.tests.profiling.profile_site", limit=10, profile_output=None)
+        return command.stdout.getvalue()
+
+    def test_should_default_to_the_first_superuser(self):
+        User.objects.create(username="inactive", is_superuser=True, is_active=False)
+        User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        output = self.call_command()
+        self.assertTrue("GET /" in output)
+        self.assertTrue("\nTabs:\n  Main" in output)
+
+    def test_should_require_a_superuser(self):
+        self.assertRaises(CommandError, self.handle)
+
+    def test_user_option(self):
+        self.assertRaises(CommandError, self.handle, username="unknown")
+        User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.assertTrue("Tabs:" in self.call_command(username="admin"))
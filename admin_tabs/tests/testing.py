@@ -0,0 +1,85 @@
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Group, User
+from django.template import Template
+from django.test import TestCase
+
+from admin_tabs import choices
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+from admin_tabs.testing import TabbedAdminTestMixin
+
+__all__ = [
+    "TabbedAdminTestMixinTests",
+]
+
+
+class GroupNameInline(TabularInline):
+    model = User.groups.through
+    fields = ("group_name",)
+    readonly_fields = ("group_name",)
+    extra = 0
+
+    def group_name(self, obj):
+        return obj.group.name  # One query by row
+
+
+class BudgetPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "first_name"])
+        groups = Config(inline="GroupNameInline")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+        groups_col = Config(fieldsets=["groups"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        groups_tab = Config(name="Groups", cols=["groups_col"])
+
+
+class BudgetAdmin(TabbedModelAdmin):
+    page_config_class = BudgetPageConfig
+    inlines = (GroupNameInline,)
+    cache_form_classes = True
+    change_form_template = Template(
+        "{% load admin_tabs_tags %}"
+        "{% for tab in page_config %}{% for col in tab %}"
+        "{% render_fieldsets_for_admincol col %}"
+        "{% endfor %}{% endfor %}"
+    )
+
+
+class TabbedAdminTestMixinTests(TabbedAdminTestMixin, TestCase):
+
+    def setUp(self):
+        super(TabbedAdminTestMixinTests, self).setUp()
+        self.model_admin = BudgetAdmin(User, AdminSite())
+        self.user = User.objects.create(username="john")
+        self.user.groups.add(Group.objects.create(name="editors"))
+
+    def test_setup_should_clear_the_cached_choices(self):
+        choices._process_choices["auth.group"] = {"key": [(1, "stale")]}
+        TabbedAdminTestMixin.setUp(self)
+        self.assertEqual(choices._process_choices, {})
+
+    def test_should_count_the_first_rendering(self):
+        self.count_queries(self.model_admin, self.user.pk)
+        self.assertTrue(self.model_admin._form_classes)
+        warm = self.count_queries(self.model_admin, self.user.pk, warm=True)
+        cold = self.count_queries(self.model_admin, self.user.pk)
+        self.assertTrue(cold[None] > warm[None])
+
+    def test_should_count_the_queries_of_each_tab(self):
+        counts = self.count_queries(self.model_admin, self.user.pk)
+        self.assertEqual(counts["Main"], 0)
+        self.assertEqual(counts["Groups"], 1)
+        self.assertQueryBudget(self.model_admin, self.user.pk, tabs={"Main": 0, "Groups": 1})
+        self.assertRaises(AssertionError, self.assertQueryBudget, self.model_admin, self.user.pk,
+            tabs={"Groups": 0})
+
+    def test_should_detect_the_queries_growing_with_the_rows(self):
+        def add_rows():
+            self.user.groups.add(Group.objects.create(name="writers"))
+        self.assertRaises(AssertionError, self.assertQueriesDoNotGrow, self.model_admin,
+            self.user.pk, add_rows)
@@ -0,0 +1,167 @@
+from django.contrib.admin.options import TabularInline
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import Group, Permission, User
+from django.db import connections, transaction, DatabaseError
+from django.test import TestCase, TransactionTestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+from admin_tabs.helpers import TRANSACTION_ON_POST, TRANSACTION_PER_REQUEST, TRANSACTION_TAB_SAVEPOINTS
+
+__all__ = [
+    "TabSavepointsTests",
+    "TransactionRollbackTests",
+]
+
+
+class GroupsInline(TabularInline):
+    model = User.groups.through
+    extra = 0
+
+
+class PermissionsInline(TabularInline):
+    model = User.user_permissions.through
+    extra = 0
+
+
+class TransactionsPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username"])
+        groups = Config(inline="GroupsInline")
+        permissions = Config(inline="PermissionsInline")
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main", "groups"])
+        permissions_col = Config(fieldsets=["permissions"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+        permissions_tab = Config(name="Permissions", cols=["permissions_col"])
+
+
+class TransactionsAdmin(TabbedModelAdmin):
+    page_config_class = TransactionsPageConfig
+    inlines = (GroupsInline, PermissionsInline)
+
+    def save_formset(self, request, form, formset, change):
+        if formset.model is PermissionsInline.model:
+            raise DatabaseError("permissions are locked")
+        return super(TransactionsAdmin, self).save_formset(request, form, formset, change)
+
+
+class MessagesStorage(list):
+
+    def add(self, level, message, extra_tags=""):
+        self.append(message)
+
+
+class TransactionsTestMixin(object):
+
+    def setUp(self):
+        self.model_admin = TransactionsAdmin(User, AdminSite())
+        self.model_admin.message_user = lambda request, message: None
+        self.admin = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        self.user = User.objects.create(username="john")
+        self.group = Group.objects.create(name="editors")
+        self.permission = Permission.objects.all()[0]
+
+    def post(self):
+        request = RequestFactory().get("/")
+        request.user = self.admin
+        prefixes = [FormSet.get_default_prefix() for FormSet in self.model_admin.get_formsets(request, self.user)]
+        data = {"username": "johnny"}
+        for prefix, name, value in zip(prefixes, ("group", "permission"), (self.group.pk, self.permission.pk)):
+            data.update({
+                "%s-TOTAL_FORMS" % prefix: "1",
+                "%s-INITIAL_FORMS" % prefix: "0",
+                "%s-MAX_NUM_FORMS" % prefix: "",
+                "%s-0-%s" % (prefix, name): str(value),
+            })
+        request = RequestFactory().post("/", data)
+        request.user = self.admin
+        request._dont_enforce_csrf_checks = True
+        request._messages = MessagesStorage()
+        response = self.model_admin.change_view(request, str(self.user.pk))
+        return request, response
+
+
+class TabSavepointsTests(TransactionsTestMixin, TestCase):
+    """
+    The savepoints are not supported by the sqlite backend of Django 1.4:
+    the feature is forced on and the savepoint queries are recorded.
+    """
+
+    def setUp(self):
+        super(TabSavepointsTests, self).setUp()
+        self.model_admin.transaction_strategy = TRANSACTION_TAB_SAVEPOINTS
+        self.savepoints = []
+        self.connection = connection = connections["default"]
+        self.uses_savepoints = connection.features.uses_savepoints
+        connection.features.uses_savepoints = True
+        for name in ("_savepoint", "_savepoint_rollback", "_savepoint_commit"):
+            setattr(connection, name, lambda sid, name=name: self.savepoints.append(name))
+
+    def tearDown(self):
+        self.connection.features.uses_savepoints = self.uses_savepoints
+        for name in ("_savepoint", "_savepoint_rollback", "_savepoint_commit"):
+            delattr(self.connection, name)
+
+    def test_failed_tab_should_be_rolled_back_alone(self):
+        request, response = self.post()
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.username, "johnny")
+        self.assertEqual(list(user.groups.all()), [self.group])
+        self.assertEqual(list(user.user_permissions.all()), [])
+        self.assertEqual(self.savepoints, [
+            "_savepoint", "_savepoint_commit",  # Main
+            "_savepoint", "_savepoint_rollback",  # Permissions
+        ])
+        self.assertEqual(request._messages, [
+            u'The changes of the "Permissions" tab could not be saved: permissions are locked'
+        ])
+
+    def test_failed_tab_should_be_rendered_again(self):
+        request, response = self.post()
+        self.assertEqual(response.status_code, 200)
+        main_formset, permissions_formset = [
+            inline_admin_formset.formset for inline_admin_formset in response.context_data["inline_admin_formsets"]
+        ]
+        # The saved tab shows the saved rows, the failed one keeps the input
+        self.assertFalse(main_formset.is_bound)
+        self.assertEqual(main_formset.initial_form_count(), 1)
+        self.assertTrue(permissions_formset.is_bound)
+        self.assertEqual(permissions_formset.forms[0]["permission"].value(), str(self.permission.pk))
+        self.assertEqual(permissions_formset.non_form_errors(), [
+            u'The changes of the "Permissions" tab could not be saved: permissions are locked'
+        ])
+        self.assertEqual(response.context_data["adminform"].form["username"].value(), "johnny")
+        response.render()
+        self.assertTrue("permissions are locked" in response.content)
+
+
+class TransactionRollbackTests(TransactionsTestMixin, TransactionTestCase):
+    """
+    Without savepoints, an error in a tab rolls back the whole change.
+    """
+
+    def test_should_roll_back_everything(self):
+        for strategy in (TRANSACTION_ON_POST, TRANSACTION_PER_REQUEST):
+            self.model_admin.transaction_strategy = strategy
+            self.assertRaises(DatabaseError, self.post)
+            user = User.objects.get(pk=self.user.pk)
+            self.assertEqual(user.username, "john")
+            self.assertEqual(list(user.groups.all()), [])
+
+    def test_get_should_release_the_read_transaction(self):
+        rollbacks = []
+        rollback_unless_managed = transaction.rollback_unless_managed
+        transaction.rollback_unless_managed = lambda using=None: rollbacks.append(using)
+        try:
+            request = RequestFactory().get("/")
+            request.user = self.admin
+            response = self.model_admin.change_view(request, str(self.user.pk))
+        finally:
+            transaction.rollback_unless_managed = rollback_unless_managed
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rollbacks, ["default"])
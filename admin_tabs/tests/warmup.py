@@ -0,0 +1,126 @@
+import logging
+
+from django.contrib import admin
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from admin_tabs.helpers import TabbedPageConfig, TabbedModelAdmin, Config
+from admin_tabs.warmup import get_admin_sites, get_warmup_users, logger, warmup
+
+__all__ = [
+    "FormClassesCacheTests",
+    "WarmupTests",
+]
+
+
+another_site = AdminSite(name="another_admin")
+
+
+class UserPageConfig(TabbedPageConfig):
+
+    class FieldsetsConfig:
+        main = Config(fields=["username", "email"])
+
+    class ColsConfig:
+        main_col = Config(fieldsets=["main"])
+
+    class TabsConfig:
+        main_tab = Config(name="Main", cols=["main_col"])
+
+
+class UserAdmin(TabbedModelAdmin):
+    page_config_class = UserPageConfig
+    cache_form_classes = True
+
+
+class FormClassesCacheTests(TestCase):
+
+    def setUp(self):
+        self.request = RequestFactory().get("/")
+        self.request.user = User(username="admin", is_superuser=True)
+
+    def test_should_reuse_form_classes(self):
+        model_admin = UserAdmin(User, AdminSite())
+        form = model_admin.get_form(self.request)
+        self.assertTrue(form is model_admin.get_form(self.request))
+        self.assertEqual(form.base_fields.keys(), ["username", "email"])
+        # The change form is not the add form
+        self.assertFalse(form is model_admin.get_form(self.request, User(pk=1)))
+        # Extra arguments bypass the cache
+        self.assertFalse(form is model_admin.get_form(self.request, fields=["email"]))
+
+    def test_should_not_reuse_form_classes_by_default(self):
+        model_admin = UserAdmin(User, AdminSite())
+        model_admin.cache_form_classes = False
+        form = model_admin.get_form(self.request)
+        self.assertFalse(form is model_admin.get_form(self.request))
+        self.assertEqual(model_admin._form_classes, {})
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class BrokenRegistry(object):
+
+    def values(self):
+        raise DatabaseError("no such table: auth_user")
+
+
+class WarmupTests(TestCase):
+
+    def test_should_warm_up_tabbed_model_admins(self):
+        site = AdminSite()
+        site.register(User, UserAdmin)
+        superuser = User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        warmed = warmup(sites=[site])
+        model_admin = site._registry[User]
+        self.assertEqual([m for m, seconds in warmed], [model_admin])
+        self.assertEqual(len(model_admin._page_configs), 1)
+        # The add view and the change view of the first user
+        self.assertEqual(len(model_admin._form_classes), 2)
+        request = RequestFactory().get("/")
+        request.user = superuser
+        self.assertTrue(model_admin.get_form(request) in model_admin._form_classes.values())
+        self.assertTrue(model_admin.get_form(request, superuser) in model_admin._form_classes.values())
+
+    def test_should_warm_up_each_permission_set(self):
+        User.objects.create(username="admin", is_staff=True, is_superuser=True)
+        User.objects.create(username="admin2", is_staff=True, is_superuser=True)
+        editor = User.objects.create(username="editor", is_staff=True)
+        User.objects.create(username="editor2", is_staff=True)
+        User.objects.create(username="visitor")
+        self.assertEqual([user.username for user in get_warmup_users()], ["admin", "editor"])
+        site = AdminSite()
+        site.register(User, UserAdmin)
+        warmup(sites=[site])
+        request = RequestFactory().get("/")
+        request.user = editor
+        model_admin = site._registry[User]
+        self.assertTrue(model_admin.get_form(request, editor) in model_admin._form_classes.values())
+
+    def test_admin_sites(self):
+        self.assertEqual(get_admin_sites(), [admin.site])
+        with self.settings(ADMIN_TABS_WARMUP_SITES=["django.contrib.admin.site", "admin_tabs.tests.warmup.another_site"]):
+            self.assertEqual(get_admin_sites(), [admin.site, another_site])
+
+    def test_should_fail_silently(self):
+        site = AdminSite()
+        site._registry = BrokenRegistry()
+        self.assertRaises(DatabaseError, warmup, sites=[site])
+        handler = RecordingHandler()
+        logger.addHandler(handler)
+        try:
+            self.assertEqual(warmup(sites=[site], fail_silently=True), [])
+        finally:
+            logger.removeHandler(handler)
+        self.assertEqual([record.levelname for record in handler.records], ["ERROR"])
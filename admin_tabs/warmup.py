@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Build the layouts, form classes and templates of the tabbed model admins
+before the first request.
+
+Call `warmup(fail_silently=True)` at the end of your wsgi module, and run
+your server with a preforking option (eg. `gunicorn --preload`): the workers
+then share the warmed up objects instead of building them on their first
+request.
+
+The form classes are only kept by the model admins with
+`cache_form_classes = True`, and the templates if the cached template loader
+(django.template.loaders.cached.Loader) is in your TEMPLATE_LOADERS.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.urlresolvers import get_resolver
+from django.db import connections
+from django.http import HttpRequest
+from django.utils.importlib import import_module
+
+from admin_tabs.helpers import TabbedModelAdmin, permissions_key
+
+logger = logging.getLogger("admin_tabs.warmup")
+
+
+def get_admin_sites():
+    """
+    Returns the admin sites listed, as dotted paths, in the
+    ADMIN_TABS_WARMUP_SITES setting, or django.contrib.admin.site.
+    """
+    paths = getattr(settings, "ADMIN_TABS_WARMUP_SITES", None)
+    if paths is None:
+        return [admin.site]
+    sites = []
+    for path in paths:
+        module_name, attr = path.rsplit(".", 1)
+        sites.append(getattr(import_module(module_name), attr))
+    return sites
+
+
+def get_warmup_users():
+    """
+    Returns one active staff user by distinct set of permissions, the
+    superusers first, among the first ADMIN_TABS_WARMUP_USERS (default to
+    20) ones, or an anonymous user.
+    """
+    users = []
+    keys = set()
+    limit = getattr(settings, "ADMIN_TABS_WARMUP_USERS", 20)
+    for user in User.objects.filter(is_active=True, is_staff=True).order_by("-is_superuser", "pk")[:limit]:
+        key = permissions_key(user)
+        if key not in keys:
+            keys.add(key)
+            users.append(user)
+    return users or [AnonymousUser()]
+
+
+def get_warmup_request(user):
+    """
+    Returns a fake GET request of `user`.
+    """
+    request = HttpRequest()
+    request.method = "GET"
+    request.user = user
+    return request
+
+
+def warmup(sites=None, user=None, fail_silently=False):
+    """
+    Warm up every TabbedModelAdmin registered on `sites` (default to
+    get_admin_sites()), for `user` or for each of get_warmup_users().
+
+    Returns a list of (model_admin, seconds) tuples. With `fail_silently`,
+    an error (eg. an unreachable database) is logged and the warm up is
+    left for the first requests.
+    """
+    warmed = []
+    try:
+        # Importing the urlconf runs admin.autodiscover() in most projects
+        get_resolver(None)._populate()
+        if sites is None:
+            sites = get_admin_sites()
+        users = [user] if user is not None else get_warmup_users()
+        for site in sites:
+            for model_admin in site._registry.values():
+                if not isinstance(model_admin, TabbedModelAdmin): continue
+                start = time.time()
+                for warmup_user in users:
+                    model_admin.warmup(get_warmup_request(warmup_user))
+                warmed.append((model_admin, time.time() - start))
+    except Exception:
+        if not fail_silently:
+            raise
+        logger.exception("The tabbed model admins could not be warmed up")
+    finally:
+        # Do not share the database connections with the forked workers
+        for connection in connections.all():
+            connection.close()
+    return warmed
@@ -4,29 +4,32 @@ from django.contrib.admin.options import StackedInline
 from example_admintabs_project.example_app.models import Article, Category
 
 from admin_tabs.helpers import TabbedModelAdmin, TabbedPageConfig, Config
+from admin_tabs.conditions import obj_attr
 
 
 class ArticlePageConfig(TabbedPageConfig):
     class FieldsetsConfig:
         titles = Config(fields=["title", "subtitle"], name="Title & Subtitle")
-        miscdata = Config(fields=["modified_at", "created_at", "is_online"], name="Dates & State")
+        miscdata = Config(fields=["created_at", "is_online"], name="Dates & State")
+        lastupdate = Config(fields=["modified_at"], name="Last update", visible=obj_attr("is_online"))
         content = Config(name="Content", fields=["content"])
         authors = Config(name="Authors", inline="ArticleToUserInline")
-        categories = Config(name="Category", inline="ArticleToCategoryInline")
+        categories = Config(name="Category", inline="ArticleToCategoryInline", cached_choices=["category"])
     
     class ColsConfig:
         content_col = Config(name="Contenu", fieldsets=["content"], css_classes=["col1"])
-        titles_col = Config(name="Titles", fieldsets=["titles", "miscdata"], css_classes=["col1"])
+        titles_col = Config(name="Titles", fieldsets=["titles", "miscdata", "lastupdate"], css_classes=["col1"])
         authors_col = Config(name="Authors", fieldsets=["authors"], css_classes=["col1"])
         categories_col = Config(name="Categories", fieldsets=["categories"], css_classes=["col1"])
     
     class TabsConfig:
-        main_tab = Config(name="Main", cols=["content_col", "titles_col"])
+        main_tab = Config(name="Main", cols=["content_col", "titles_col"], bulk_edit=True)
         secondary_tab = Config(name="Relations", cols=["authors_col", "categories_col"])
 
 
 class ArticleToUserInline(StackedInline):
     model = Article.authors.through
+    raw_id_fields = ("user",)  # Too many users for a select, or for cached choices
 
 
 class ArticleToCategoryInline(StackedInline):
@@ -38,6 +41,13 @@ class ArticleAdmin(TabbedModelAdmin):
     readonly_fields = ('created_at', 'modified_at')
     inlines = (ArticleToUserInline, ArticleToCategoryInline)
     change_form_template = 'example_app/change_form.html'
+    cache_form_classes = True
+    skip_unchanged_inlines = True
+    optimistic_locking = True
+    defer_tab_media = True
+    bulk_save_inlines = True
+    only_layout_fields = True
+    cache_empty_forms = True
 
     class Media:
         css = {
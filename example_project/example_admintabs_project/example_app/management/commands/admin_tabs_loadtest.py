@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+"""
+Load test of the tabbed change view of the articles, under concurrency:
+
+    ./manage.py admin_tabs_loadtest --articles 20 --relations 10 --threads 8 --requests 50
+
+Seeds the articles, each one with `--relations` authors and categories (half
+of them online), then each thread logs in with its own test client and
+opens random change forms, posting back a part of them. The latency
+percentiles and the throughput of the GETs and POSTs are reported.
+
+Every change form is checked against its article: its title, its inline
+rows and the "Last update" fieldset, only shown for the online articles.
+A layout or an object leaking from a concurrent request fails the command.
+
+It runs against the configured database, so it refuses to run with DEBUG
+off unless --force is given. The load test user gets a random password, and
+the user and the rows created by the seeding are deleted at the end: it
+refuses to run when the user or the articles already exist, since it would
+change them, and only reuses the existing authors and categories. With
+sqlite, concurrent POSTs may fail with "database is locked" and be counted
+as errors.
+"""
+import math
+import random
+import threading
+import time
+from optparse import make_option
+
+try:
+    from HTMLParser import HTMLParser
+    from htmlentitydefs import name2codepoint
+except ImportError:  # Python 3
+    from html.parser import HTMLParser
+    from html.entities import name2codepoint
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import reverse
+from django.test.client import Client
+
+from example_admintabs_project.example_app.models import Article, Category
+
+LOADTEST_USERNAME = "admin_tabs_loadtest"
+ARTICLE_TITLE = "Load test article %d"
+
+
+class FormParser(HTMLParser):
+    """
+    Collect the values of the fields of an HTML page, as posted by a
+    browser, in the `data` dict {name: [value, ...]}. The fields of the
+    empty forms of the inlines ("__prefix__") are left out.
+    """
+    def __init__(self):
+        HTMLParser.__init__(self)
+        self.data = {}
+        self._select = None
+        self._textarea = None
+
+    def add(self, name, value):
+        if name and "__prefix__" not in name:
+            self.data.setdefault(name, []).append(value)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "input":
+            input_type = attrs.get("type", "text").lower()
+            if input_type in ("submit", "button", "image", "reset"):
+                return
+            if input_type in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            self.add(attrs.get("name"), attrs.get("value") or ("on" if input_type == "checkbox" else ""))
+        elif tag == "select":
+            self._select = attrs.get("name")
+        elif tag == "option" and self._select and "selected" in attrs:
+            self.add(self._select, attrs.get("value", ""))
+        elif tag == "textarea":
+            self._textarea = [attrs.get("name"), u""]
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+        elif tag == "textarea" and self._textarea:
+            name, value = self._textarea
+            # The first newline is not part of the value
+            self.add(name, value[1:] if value.startswith(u"\n") else value)
+            self._textarea = None
+
+    def handle_data(self, data):
+        if self._textarea:
+            self._textarea[1] += data
+
+    def handle_entityref(self, name):
+        if self._textarea:
+            self._textarea[1] += unichr(name2codepoint.get(name, 63))
+
+    def handle_charref(self, name):
+        if self._textarea:
+            code = int(name[1:], 16) if name[:1] in ("x", "X") else int(name)
+            self._textarea[1] += unichr(code)
+
+
+def parse_form(content):
+    """
+    Returns the {name: [value, ...]} fields of the HTML `content`.
+    """
+    parser = FormParser()
+    parser.feed(content.decode("utf-8"))
+    parser.close()
+    return parser.data
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest rank `percent` percentile of the sorted `values`.
+    """
+    if not values:
+        return 0
+    rank = int(math.ceil(percent / 100.0 * len(values)))
+    return values[max(rank, 1) - 1]
+
+
+def check_layout(content, article):
+    """
+    Returns the differences between the change form `content` and the
+    `article` dict (see Command.seed) it was requested for.
+    """
+    problems = []
+    data = parse_form(content)
+    if data.get("title") != [article["title"]]:
+        problems.append("article %s: title %r" % (article["pk"], data.get("title")))
+    if ("<h2>Last update</h2>" in content) != article["is_online"]:
+        problems.append("article %s: \"Last update\" fieldset %s" % (
+            article["pk"], "missing" if article["is_online"] else "shown offline"))
+    for prefix in ("Article_authors", "Article_categories"):
+        initial_forms = data.get("%s-INITIAL_FORMS" % prefix)
+        if initial_forms != [str(article["relations"])]:
+            problems.append("article %s: %s rows %r" % (article["pk"], prefix, initial_forms))
+    return problems
+
+
+class LoadTestResults(object):
+    """
+    The timings, errors and layout problems collected by the threads.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = {"GET": [], "POST": []}
+        self.conflicts = 0
+        self.errors = []
+        self.leaks = []
+
+    def add_timing(self, method, seconds):
+        with self.lock:
+            self.timings[method].append(seconds)
+
+    def add_conflict(self):
+        with self.lock:
+            self.conflicts += 1
+
+    def add_error(self, error):
+        with self.lock:
+            self.errors.append(error)
+
+    def add_leaks(self, problems):
+        with self.lock:
+            self.leaks.extend(problems)
+
+
+class LoadTestThread(threading.Thread):
+    """
+    Opens `requests` random change forms, and posts back `post_ratio` of
+    them with a new content.
+    """
+    def __init__(self, password, articles, requests, post_ratio, seed, results):
+        threading.Thread.__init__(self)
+        self.password = password
+        self.articles = articles
+        self.requests = requests
+        self.post_ratio = post_ratio
+        self.random = random.Random(seed)
+        self.results = results
+
+    def run(self):
+        client = Client()
+        if not client.login(username=LOADTEST_USERNAME, password=self.password):
+            self.results.add_error("%s: login failed" % self.name)
+            return
+        for i in range(self.requests):
+            article = self.random.choice(self.articles)
+            try:
+                self.open_article(client, article, i)
+            except Exception as e:
+                self.results.add_error("article %s: %r" % (article["pk"], e))
+
+    def open_article(self, client, article, i):
+        url = reverse("admin:example_app_article_change", args=[article["pk"]])
+        start = time.time()
+        response = client.get(url)
+        self.results.add_timing("GET", time.time() - start)
+        if response.status_code != 200:
+            self.results.add_error("article %s: GET status %s" % (article["pk"], response.status_code))
+            return
+        self.results.add_leaks(check_layout(response.content, article))
+        if self.random.random() >= self.post_ratio:
+            return
+        data = parse_form(response.content)
+        data["content"] = ["Saved by %s, request %d" % (self.name, i)]
+        start = time.time()
+        response = client.post(url, data)
+        self.results.add_timing("POST", time.time() - start)
+        if response.status_code == 302:
+            return
+        if response.status_code == 200 and "errornote" in response.content:
+            # Saved by another thread since the GET (optimistic locking)
+            self.results.add_conflict()
+        else:
+            self.results.add_error("article %s: POST status %s" % (article["pk"], response.status_code))
+
+
+class Command(BaseCommand):
+    help = "Load test the change view of the articles from concurrent threads."
+    option_list = BaseCommand.option_list + (
+        make_option("--articles", type="int", default=20,
+            help="Number of articles to seed and to open"),
+        make_option("--relations", type="int", default=10,
+            help="Number of authors and of categories of each article"),
+        make_option("--threads", type="int", default=8,
+            help="Number of concurrent clients"),
+        make_option("--requests", type="int", default=50,
+            help="Number of change forms opened by each client"),
+        make_option("--post-ratio", dest="post_ratio", type="float", default=0.2,
+            help="Part of the change forms posted back"),
+        make_option("--seed", type="int", default=0,
+            help="Seed of the random choices of the clients"),
+        make_option("--force", action="store_true", default=False,
+            help="Run even with DEBUG off, eg. against a production database"),
+    )
+
+    def handle(self, *args, **options):
+        if options["articles"] < 1 or options["threads"] < 1:
+            raise CommandError("--articles and --threads must be positive")
+        if not settings.DEBUG and not options["force"]:
+            raise CommandError("DEBUG is off: the load test writes to the configured database, "
+                "use --force to run it anyway")
+        try:
+            articles = self.seed(options["articles"], options["relations"])
+            results = LoadTestResults()
+            threads = [
+                LoadTestThread(self.password, articles, options["requests"], options["post_ratio"],
+                    options["seed"] + i, results)
+                for i in range(options["threads"])
+            ]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            self.unseed()
+        self.report(results, time.time() - start)
+        if results.leaks:
+            raise CommandError("%d change forms did not match their article" % len(results.leaks))
+
+    def seed(self, articles, relations):
+        """
+        Create the load test user, with a random password set in
+        self.password, the articles, and the missing authors and categories.
+        Returns a list of dicts describing the articles.
+
+        Raises a CommandError if the user or one of the articles exists, eg.
+        left by another run: the user gets a new password and the content of
+        the articles is overwritten by the POSTs.
+        """
+        # The objects to delete once done, see unseed
+        self.seeded_objects = []
+        titles = [ARTICLE_TITLE % i for i in range(articles)]
+        if (User.objects.filter(username=LOADTEST_USERNAME).exists()
+                or Article.objects.filter(title__in=titles).exists()):
+            raise CommandError("The %s user or load test articles already exist, eg. left by another run: "
+                "delete them first" % LOADTEST_USERNAME)
+        self.password = User.objects.make_random_password(length=20)
+        user = User(username=LOADTEST_USERNAME, is_staff=True, is_superuser=True)
+        user.set_password(self.password)
+        user.save()
+        self.seeded_objects.append(user)
+        authors = [self.get_or_create(User, username="admin_tabs_loadtest_%d" % i) for i in range(relations)]
+        categories = [self.get_or_create(Category, title="Load test category %d" % i) for i in range(relations)]
+        seeded = []
+        for i, title in enumerate(titles):
+            article = Article.objects.create(title=title, subtitle="Subtitle", is_online=i % 2 == 0)
+            self.seeded_objects.append(article)
+            article.authors = authors
+            article.categories = categories
+            seeded.append({
+                "pk": article.pk,
+                "title": article.title,
+                "is_online": article.is_online,
+                "relations": relations,
+            })
+        return seeded
+
+    def get_or_create(self, model, **kwargs):
+        obj, created = model.objects.get_or_create(**kwargs)
+        if created:
+            self.seeded_objects.append(obj)
+        return obj
+
+    def unseed(self):
+        """
+        Delete the load test user and the objects created by seed().
+        """
+        for obj in reversed(getattr(self, "seeded_objects", [])):
+            obj.delete()
+        self.seeded_objects = []
+
+    def report(self, results, seconds):
+        for method in ("GET", "POST"):
+            timings = sorted(results.timings[method])
+            if not timings:
+                continue
+            self.stdout.write("%s: %d requests, %.1f req/s, p50 %.1f ms, p95 %.1f ms, p99 %.1f ms, max %.1f ms\n" % (
+                method, len(timings), len(timings) / seconds,
+                percentile(timings, 50) * 1000, percentile(timings, 95) * 1000,
+                percentile(timings, 99) * 1000, timings[-1] * 1000))
+        total = sum(len(timings) for timings in results.timings.values())
+        self.stdout.write("Total: %d requests in %.2f s, %.1f req/s\n" % (total, seconds, total / seconds))
+        self.stdout.write("Conflicts: %d\n" % results.conflicts)
+        self.stdout.write("Errors: %d\n" % len(results.errors))
+        for error in results.errors[:10]:
+            self.stdout.write("  %s\n" % error)
+        self.stdout.write("Layout leaks: %d\n" % len(results.leaks))
+        for problem in results.leaks[:10]:
+            self.stdout.write("  %s\n" % problem)
@@ -1,16 +1,119 @@
-"""
-This file demonstrates writing tests using the unittest module. These will pass
-when you run "manage.py test".
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import CommandError
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
 
-Replace this with more appropriate tests for your application.
-"""
+from admin_tabs import metrics
+from admin_tabs.testing import TabbedAdminTestMixin
 
-from django.test import TestCase
+from example_admintabs_project.example_app.admin import ArticleAdmin
+from example_admintabs_project.example_app.management.commands import admin_tabs_loadtest
+from example_admintabs_project.example_app.models import Article, Category
+
+
+class ArticleAdminQueriesTests(TabbedAdminTestMixin, TestCase):
+
+    def setUp(self):
+        self.model_admin = ArticleAdmin(Article, admin.site)
+        self.article = Article.objects.create(title="Title", subtitle="Subtitle", is_online=True)
+        self.article.categories.add(Category.objects.create(title="News"))
+        self.article.authors.add(User.objects.create(username="author"))
+
+    def test_change_form_query_budget(self):
+        self.assertQueryBudget(self.model_admin, self.article.pk, page=10, tabs={
+            "Main": 0,
+            "Relations": 1,  # The label of the raw id of the author
+        })
+        self.assertQueryBudget(self.model_admin, self.article.pk, page=4, warm=True)
+
+    def test_add_form_query_budget(self):
+        self.assertQueryBudget(self.model_admin, page=5, tabs={
+            "Main": 0,
+            "Relations": 0,
+        })
+        self.assertQueryBudget(self.model_admin, page=2, warm=True)
+
+    def test_query_budget_should_fail(self):
+        self.assertRaises(AssertionError, self.assertQueryBudget, self.model_admin,
+            self.article.pk, page=1)
+
+    def test_queries_should_not_grow_with_the_inline_rows(self):
+        # The raw ids of the authors are labelled one by one by Django
+        def add_rows():
+            for title in ("Sports", "Weather"):
+                self.article.categories.add(Category.objects.create(title=title))
+        self.assertQueriesDoNotGrow(self.model_admin, self.article.pk, add_rows)
+
+    def test_tab_metrics(self):
+        backend = metrics.InMemoryBackend()
+        previous_backend = metrics.set_backend(backend)
+        try:
+            self.render_tabbed_form(self.model_admin, self.article.pk)
+        finally:
+            metrics.set_backend(previous_backend)
+        self.assertEqual(len(backend.values("example_app.article.tab.main.time")), 1)
+        self.assertEqual(len(backend.values("example_app.article.tab.relations.size")), 1)
+
+
+class LoadTestTests(TestCase):
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(admin_tabs_loadtest.percentile(values, 50), 50)
+        self.assertEqual(admin_tabs_loadtest.percentile(values, 99), 99)
+        self.assertEqual(admin_tabs_loadtest.percentile([3], 95), 3)
+        self.assertEqual(admin_tabs_loadtest.percentile([], 95), 0)
+
+    def test_parse_form(self):
+        self.assertEqual(admin_tabs_loadtest.parse_form(
+            '<input type="text" name="title" value="A &amp; B" />'
+            '<input type="checkbox" name="is_online" checked="checked" />'
+            '<input type="checkbox" name="other" />'
+            '<select name="f-0-user"><option value="">---</option><option value="2" selected="selected">x</option></select>'
+            '<select name="f-__prefix__-user"><option value="1" selected="selected">y</option></select>'
+            '<textarea name="content">\nline &lt;1&gt;</textarea>'
+            '<input type="submit" name="_save" value="Save" />'), {
+            "title": [u"A & B"],
+            "is_online": [u"on"],
+            "f-0-user": [u"2"],
+            "content": [u"line <1>"],
+        })
+
+    def test_check_layout(self):
+        command = admin_tabs_loadtest.Command()
+        articles = command.seed(articles=2, relations=2)
+        client = Client()
+        self.assertTrue(client.login(username=admin_tabs_loadtest.LOADTEST_USERNAME,
+            password=command.password))
+        for article in articles:
+            response = client.get(reverse("admin:example_app_article_change", args=[article["pk"]]))
+            self.assertEqual(admin_tabs_loadtest.check_layout(response.content, article), [])
+        other = dict(article, title="Another", is_online=not article["is_online"], relations=3)
+        self.assertEqual(len(admin_tabs_loadtest.check_layout(response.content, other)), 4)
+
+    def test_seeded_objects_should_be_deleted(self):
+        existing = Category.objects.create(title="Load test category 0")
+        command = admin_tabs_loadtest.Command()
+        command.seed(articles=2, relations=2)
+        self.assertEqual(Article.objects.count(), 2)
+        command.unseed()
+        self.assertEqual(Article.objects.count(), 0)
+        self.assertFalse(User.objects.filter(username__startswith="admin_tabs_loadtest").exists())
+        self.assertEqual(list(Category.objects.all()), [existing])
 
+    def test_should_refuse_existing_seed_objects(self):
+        Article.objects.create(title=admin_tabs_loadtest.ARTICLE_TITLE % 1, subtitle="Mine")
+        command = admin_tabs_loadtest.Command()
+        self.assertRaises(CommandError, command.seed, articles=2, relations=2)
+        command.unseed()
+        self.assertEqual(list(Article.objects.values_list("subtitle", flat=True)), [u"Mine"])
+        User.objects.create(username=admin_tabs_loadtest.LOADTEST_USERNAME)
+        self.assertRaises(CommandError, command.seed, articles=0, relations=2)
+        self.assertTrue(User.objects.filter(username=admin_tabs_loadtest.LOADTEST_USERNAME).exists())
 
-class SimpleTest(TestCase):
-    def test_basic_addition(self):
-        """
-        Tests that 1 + 1 always equals 2.
-        """
-        self.assertEqual(1 + 1, 2)
+    def test_should_refuse_to_run_without_debug(self):
+        with self.settings(DEBUG=False):
+            self.assertRaises(CommandError, admin_tabs_loadtest.Command().handle, articles=1,
+                relations=1, threads=1, requests=1, post_ratio=0, seed=0, force=False)
@@ -84,10 +84,14 @@ STATICFILES_FINDERS = (
 SECRET_KEY = 'akk)3bd$#%y(=joofnu^ry4s(v98$01hsacjajcgv8mqvw8s*)'
 
 # List of callables that know how to import templates from various sources.
+# The templates are compiled once, eg. by the warm up of the wsgi module:
+# restart the server to see your changes
 TEMPLATE_LOADERS = (
-    'django.template.loaders.filesystem.Loader',
-    'django.template.loaders.app_directories.Loader',
-#     'django.template.loaders.eggs.Loader',
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+#         'django.template.loaders.eggs.Loader',
+    )),
 )
 
 MIDDLEWARE_CLASSES = (
@@ -23,6 +23,12 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "example_admintabs_project.setti
 from django.core.wsgi import get_wsgi_application
 application = get_wsgi_application()
 
+# Build the tabbed admin layouts, form classes and templates now, so that
+# preforked workers (eg. gunicorn --preload) share them. An error, eg. an
+# unreachable or unsynced database, is logged and does not stop the app.
+from admin_tabs.warmup import warmup
+warmup(fail_silently=True)
+
 # Apply WSGI middleware here.
 # from helloworld.wsgi import HelloWorldApplication
 # application = HelloWorldApplication(application)